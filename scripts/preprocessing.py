@@ -1,9 +1,17 @@
 import osmium as osm
 import csv
-from shapely import wkt
-from shapely.geometry import Point
+import numpy as np
+import shapely
+from shapely import wkb
 from tqdm import tqdm
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow нужен только для вывода в Parquet
+    pa = None
+    pq = None
+
 
 # Примерный bbox Москвы (можно подправить при желании)
 MOSCOW_LAT_MIN = 55.2
@@ -11,20 +19,52 @@ MOSCOW_LAT_MAX = 56.1
 MOSCOW_LON_MIN = 36.8
 MOSCOW_LON_MAX = 38.1
 
+# Широкий статический bbox с запасом вокруг всей Москвы (вместе с Новой Москвой
+# и Зеленоградом) и bbox выше: здания вне него отбрасываются ещё во время
+# прохода по PBF, чтобы в памяти копились только возможные московские здания
+PREFILTER_LAT_MIN = 55.0
+PREFILTER_LAT_MAX = 56.2
+PREFILTER_LON_MIN = 36.6
+PREFILTER_LON_MAX = 38.3
+
+# Растровый префильтр границы: шаг сетки в градусах (~100 м) и состояния клеток.
+# Точки во внутренних и внешних клетках решаются одним обращением к массиву,
+# до GEOS доходят только точки в клетках, через которые проходит граница
+RASTER_RES = 0.001
+RASTER_OUTSIDE = 0
+RASTER_INSIDE = 1
+RASTER_BORDER = 2
+
+# Колонки выходного файла и размер RecordBatch при записи в Parquet
+OUTPUT_COLUMNS = ["osm_id", "city", "street", "housenumber", "lon", "lat"]
+PARQUET_BATCH_ROWS = 65_536
+
 
 class MoscowBoundaryHandler(osm.SimpleHandler):
     """
-    Первый проход по PBF:
-    пытаемся найти административную границу Москвы.
+    Сбор кандидатов в административную границу Москвы:
     boundary=administrative, name ~ Москва/Moscow.
     admin_level не жёстко фиксируем, а смотрим разные.
     """
 
     def __init__(self):
         super().__init__()
-        self.wkt_factory = osm.geom.WKTFactory()
+        # WKB разбирается GEOS на C, в отличие от токенизации WKT на Python
+        self.wkb_factory = osm.geom.WKBFactory()
         self.candidates = []  # (admin_level, name, geometry)
 
+    def _area_geometry(self, a):
+        """Мультиполигон area как shapely-геометрия (None, если не собрался)."""
+        try:
+            mp_wkb = self.wkb_factory.create_multipolygon(a)
+        except Exception:
+            return None
+
+        try:
+            return wkb.loads(mp_wkb, hex=True)
+        except Exception:
+            return None
+
     def area(self, a):
         tags = a.tags
 
@@ -38,14 +78,8 @@ class MoscowBoundaryHandler(osm.SimpleHandler):
 
         admin_level = tags.get("admin_level", "")
 
-        try:
-            mp_wkt = self.wkt_factory.create_multipolygon(a)
-        except Exception:
-            return
-
-        try:
-            geom = wkt.loads(mp_wkt)
-        except Exception:
+        geom = self._area_geometry(a)
+        if geom is None:
             return
 
         self.candidates.append((admin_level, name, geom))
@@ -76,45 +110,135 @@ def choose_moscow_boundary(candidates):
     return max(candidates, key=lambda c: c[2].area)
 
 
-class MoscowBuildingsHandler(osm.SimpleHandler):
+class MoscowBuildingsHandler(MoscowBoundaryHandler):
     """
-    Второй проход по PBF:
-    собираем все building=*,
-    считаем центроид и отбираем:
+    Единственный проход по PBF:
+    одновременно собираем кандидатов в границу Москвы (см. MoscowBoundaryHandler)
+    и все building=* с их центроидами.
+
+    Граница становится известна только в конце прохода, поэтому здания
+    из широкого статического bbox (PREFILTER_*) сначала копятся в self.rows,
+    а точный отбор делается в write_rows():
       - либо по попаданию в polygon Москвы (boundary),
       - либо по bbox, если границу не нашли.
     """
 
-    def __init__(self, csv_writer, moscow_boundary_geom=None):
+    def __init__(self):
         super().__init__()
-        self.writer = csv_writer
-        self.boundary = moscow_boundary_geom  # shapely geometry или None
-        self.wkt_factory = osm.geom.WKTFactory()
+        self.boundary = None  # shapely geometry или None
+        self._bbox = (MOSCOW_LON_MIN, MOSCOW_LAT_MIN, MOSCOW_LON_MAX, MOSCOW_LAT_MAX)
+        self._raster = None  # см. rasterize_boundary
+        self.rows = []  # (osm_id, city, street, housenumber, lon, lat)
         self.pbar = tqdm(unit="obj", desc="Обрабатываем объекты OSM")
 
-    def _in_moscow(self, lon, lat) -> bool:
-        point = Point(lon, lat)
-        if self.boundary is not None:
-            return point.within(self.boundary)
-        # fallback: просто bbox
-        return (
-            MOSCOW_LAT_MIN <= lat <= MOSCOW_LAT_MAX and
-            MOSCOW_LON_MIN <= lon <= MOSCOW_LON_MAX
-        )
+    def set_boundary(self, moscow_boundary_geom):
+        """Задаёт границу Москвы, по которой будут отбираться здания."""
+        self.boundary = moscow_boundary_geom
+        if moscow_boundary_geom is not None:
+            # Подготовленная геометрия кэширует индекс рёбер границы,
+            # поэтому каждая проверка точки не перебирает все вершины заново
+            shapely.prepare(moscow_boundary_geom)
+            # bbox самой границы (Новая Москва выходит за константный bbox выше)
+            self._bbox = moscow_boundary_geom.bounds
+            self._raster = rasterize_boundary(moscow_boundary_geom)
+        else:
+            self._bbox = (MOSCOW_LON_MIN, MOSCOW_LAT_MIN, MOSCOW_LON_MAX, MOSCOW_LAT_MAX)
+            self._raster = None
+
+    def _add_row(self, obj_id, tags, lon, lat):
+        # Заведомо не Москва: не держим строку в памяти до конца прохода
+        if not (PREFILTER_LAT_MIN <= lat <= PREFILTER_LAT_MAX
+                and PREFILTER_LON_MIN <= lon <= PREFILTER_LON_MAX):
+            return
 
-    def _write_row(self, obj_id, tags, lon, lat):
         city = tags.get("addr:city", "") or ""
         street = tags.get("addr:street", "") or ""
         housenumber = tags.get("addr:housenumber", "") or ""
 
-        self.writer.writerow({
-            "osm_id": obj_id,
-            "city": city,
-            "street": street,
-            "housenumber": housenumber,
-            "lon": lon,
-            "lat": lat,
-        })
+        self.rows.append((obj_id, city, street, housenumber, lon, lat))
+
+    def _moscow_mask(self):
+        """
+        Для каждого накопленного здания определяет, лежит ли оно в Москве
+        (булев массив NumPy в порядке self.rows).
+
+        Все точки обрабатываются массивами: сначала bbox, затем растр границы
+        (см. rasterize_boundary). Точная проверка GEOS нужна только для точек
+        в клетках на самой границе и делается одним вызовом shapely.contains_xy.
+        """
+        count = len(self.rows)
+        lons = np.fromiter((row[4] for row in self.rows), dtype=np.float64, count=count)
+        lats = np.fromiter((row[5] for row in self.rows), dtype=np.float64, count=count)
+
+        lon_min, lat_min, lon_max, lat_max = self._bbox
+        in_bbox = (lat_min <= lats) & (lats <= lat_max) & (lon_min <= lons) & (lons <= lon_max)
+        if self._raster is None:
+            # fallback: просто bbox
+            return in_bbox
+
+        height, width = self._raster.shape
+        ix = np.minimum(((lons[in_bbox] - lon_min) / RASTER_RES).astype(np.intp), width - 1)
+        iy = np.minimum(((lat_max - lats[in_bbox]) / RASTER_RES).astype(np.intp), height - 1)
+        cells = np.full(count, RASTER_OUTSIDE, dtype=np.uint8)
+        cells[in_bbox] = self._raster[iy, ix]
+
+        mask = cells == RASTER_INSIDE
+        border = np.flatnonzero(cells == RASTER_BORDER)
+        mask[border] = shapely.contains_xy(self.boundary, lons[border], lats[border])
+        return mask
+
+    def write_rows(self, csv_writer):
+        """
+        Пишет в CSV здания, попавшие в границу Москвы (или в bbox).
+
+        Строки уже лежат кортежами в порядке колонок CSV, поэтому отдаём их
+        csv.writer одним вызовом writerows, без словаря на каждую строку.
+        """
+        mask = self._moscow_mask()
+        csv_writer.writerows(
+            row for row, in_moscow in zip(self.rows, mask) if in_moscow
+        )
+
+    def write_parquet(self, parquet_path: str):
+        """
+        Пишет те же здания, что и write_rows, но в Parquet (zstd).
+
+        Строки перекладываются в шесть колонок и сбрасываются в файл
+        RecordBatch'ами по PARQUET_BATCH_ROWS, без построчного
+        форматирования и экранирования CSV.
+        """
+        if pq is None:
+            raise ImportError("Для вывода в Parquet нужен pyarrow: pip install pyarrow")
+
+        schema = pa.schema([
+            ("osm_id", pa.int64()),
+            ("city", pa.string()),
+            ("street", pa.string()),
+            ("housenumber", pa.string()),
+            ("lon", pa.float64()),
+            ("lat", pa.float64()),
+        ])
+        columns = tuple([] for _ in OUTPUT_COLUMNS)
+
+        def flush():
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            for col in columns:
+                col.clear()
+
+        mask = self._moscow_mask()
+        with pq.ParquetWriter(parquet_path, schema, compression="zstd") as writer:
+            for row, in_moscow in zip(self.rows, mask):
+                if not in_moscow:
+                    continue
+                for col, value in zip(columns, row):
+                    col.append(value)
+                if len(columns[0]) >= PARQUET_BATCH_ROWS:
+                    flush()
+            if columns[0]:
+                flush()
 
     # --- здания-ways (простые полигоны) ---
     def way(self, w):
@@ -125,6 +249,9 @@ class MoscowBuildingsHandler(osm.SimpleHandler):
         if not w.nodes:
             return
 
+        # Центроид считаем простым циклом: pyosmium не отдаёт координаты узлов
+        # массивом, поэтому любая векторизация (NumPy/numba, WKB-линия) всё равно
+        # начинается с такого же обхода w.nodes и на зданиях в 5-10 узлов медленнее
         lon_sum = 0.0
         lat_sum = 0.0
         count = 0
@@ -146,75 +273,116 @@ class MoscowBuildingsHandler(osm.SimpleHandler):
         lon_center = lon_sum / count
         lat_center = lat_sum / count
 
-        if not self._in_moscow(lon_center, lat_center):
-            return
-
-        self._write_row(w.id, w.tags, lon_center, lat_center)
+        self._add_row(w.id, w.tags, lon_center, lat_center)
 
-    # --- здания-areas (мультиполигоны) ---
+    # --- здания-areas (мультиполигоны) и кандидаты в границу ---
     def area(self, a):
         self.pbar.update(1)
 
         if "building" not in a.tags:
+            super().area(a)
             return
-
-        try:
-            mp_wkt = self.wkt_factory.create_multipolygon(a)
-        except Exception:
+        # Замкнутый way-здание приходит и в way(), и ещё раз в area().
+        # way() его уже принял или отбросил, поэтому повторно геометрию не строим
+        # и не храним множество id всех зданий
+        if a.from_way():
             return
 
-        try:
-            geom = wkt.loads(mp_wkt)
-        except Exception:
+        geom = self._area_geometry(a)
+        if geom is None:
             return
 
         centroid = geom.centroid
 
-        if not self._in_moscow(centroid.x, centroid.y):
-            return
+        self._add_row(a.id, a.tags, centroid.x, centroid.y)
+
 
-        self._write_row(a.id, a.tags, centroid.x, centroid.y)
+def rasterize_boundary(geom, res: float = RASTER_RES):
+    """
+    Растеризует границу в сетку uint8 с шагом res над её bbox
+    (строки идут от lat_max вниз, столбцы — от lon_min вправо).
+
+    Клетка, которую пересекает линия границы, — RASTER_BORDER,
+    остальные целиком внутри (RASTER_INSIDE) или снаружи (RASTER_OUTSIDE),
+    что определяется по центру клетки. Считается построчно векторными
+    функциями shapely, чтобы не держать в памяти все клетки разом.
+    """
+    lon_min, lat_min, lon_max, lat_max = geom.bounds
+    width = max(int(np.ceil((lon_max - lon_min) / res)), 1)
+    height = max(int(np.ceil((lat_max - lat_min) / res)), 1)
+
+    edges = geom.boundary
+    shapely.prepare(edges)
+    shapely.prepare(geom)
+
+    xs = lon_min + np.arange(width) * res
+    raster = np.empty((height, width), dtype=np.uint8)
+    for iy in range(height):
+        top = lat_max - iy * res
+        cells = shapely.box(xs, top - res, xs + res, top)
+        inside = shapely.contains_xy(geom, xs + res / 2, top - res / 2)
+        raster[iy] = np.where(
+            shapely.intersects(edges, cells), RASTER_BORDER,
+            np.where(inside, RASTER_INSIDE, RASTER_OUTSIDE),
+        )
+    return raster
 
 
-def find_moscow_boundary(pbf_path: str):
+def find_moscow_boundary(candidates):
     """
-    Первый проход:
-    ищем границы Москвы и выбираем наиболее подходящую.
+    Выбирает среди собранных кандидатов наиболее подходящую границу Москвы.
     Если ничего не нашли — возвращаем None.
     """
-    handler = MoscowBoundaryHandler()
-    print("Ищем границу Москвы в PBF...")
-    handler.apply_file(pbf_path, locations=True)
-
-    if not handler.candidates:
+    if not candidates:
         print("⚠ Не удалось найти границу Москвы как area. Будем использовать bbox.")
         return None
 
-    best = choose_moscow_boundary(handler.candidates)
+    best = choose_moscow_boundary(candidates)
     admin_level, name, geom = best
     print(f"Найдена граница Москвы: name='{name}', admin_level={admin_level}")
     return geom
 
 
-def extract_moscow_buildings(pbf_path: str, csv_path: str):
+def extract_moscow_buildings(pbf_path: str, out_path: str):
     """
     Итоговый пайплайн:
-      1) пробуем найти границу Москвы;
-      2) вторым проходом собираем здания внутри границы или bbox.
-    """
-    moscow_boundary = find_moscow_boundary(pbf_path)
+      1) один проход по PBF: собираем кандидатов в границу Москвы и все здания;
+      2) выбираем границу и пишем здания внутри границы или bbox.
 
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        fieldnames = ["osm_id", "city", "street", "housenumber", "lon", "lat"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    Формат вывода определяется расширением out_path: `.parquet` — Parquet
+    через pyarrow (быстрее пишется и читается), иначе CSV.
 
-        print(f"Парсим здания в {pbf_path}...")
-        handler = MoscowBuildingsHandler(writer, moscow_boundary)
-        handler.apply_file(pbf_path, locations=True)
-        handler.pbar.close()
+    Декодирование блоков PBF libosmium и так выполняет в своём пуле потоков.
+    Проверка попадания в границу идёт в одном процессе: после растрового
+    префильтра до GEOS доходят только точки в клетках на самой границе.
 
-    print(f"Готово! Здания Москвы (по границе или bbox) сохранены в {csv_path}")
+    KeyFilter отсекает объекты без тегов building/boundary ещё в C++,
+    так что Python-колбэки и сборка мультиполигонов выполняются
+    только для нужных объектов.
+    """
+    handler = MoscowBuildingsHandler()
+    print(f"Парсим границу Москвы и здания в {pbf_path}...")
+    handler.apply_file(
+        pbf_path,
+        locations=True,
+        filters=[osm.filter.KeyFilter("building", "boundary")],
+    )
+    handler.pbar.close()
+
+    handler.set_boundary(find_moscow_boundary(handler.candidates))
+    # Остальные кандидаты — целые мультиполигоны, дальше они не нужны.
+    # Счётчик ссылок освобождает их сразу, gc.collect() не требуется
+    handler.candidates.clear()
+
+    if str(out_path).endswith(".parquet"):
+        handler.write_parquet(out_path)
+    else:
+        with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(OUTPUT_COLUMNS)
+            handler.write_rows(writer)
+
+    print(f"Готово! Здания Москвы (по границе или bbox) сохранены в {out_path}")
 
 
 if __name__ == "__main__":
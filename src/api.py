@@ -2,7 +2,9 @@
 REST API для геокодирования адресов Москвы.
 """
 
+import asyncio
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
@@ -11,24 +13,9 @@ from fastapi.responses import JSONResponse, Response, FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from .geocode_basic import geocode_basic, _get_cached_data
-from .geocode_improved import geocode_improved
+from .geocode_improved import geocode_improved, _get_fuzzy_columns
 
-app = FastAPI(
-    title="Геокодер адресов Москвы",
-    description="API для геокодирования адресов по данным OpenStreetMap",
-    version="0.1.0"
-)
-
-# Путь к статическим файлам
-STATIC_DIR = Path(__file__).parent.parent / "static"
-STATIC_DIR.mkdir(exist_ok=True)
-
-# Подключаем статические файлы
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-
-
-@app.on_event("startup")
-async def startup_event():
+def _preload_data() -> None:
     """
     Предзагрузка данных при старте API.
     Это ускоряет первый запрос, так как данные уже будут загружены и нормализованы.
@@ -37,17 +24,51 @@ async def startup_event():
     1. Из БД (если USE_DATABASE=True и БД доступна) - быстрее
     2. Из CSV - fallback
     """
-    print("Предзагрузка данных...")
     try:
         # Предзагружаем данные для базового геокодера
-        # Функция сама определит источник (БД или CSV)
-        _get_cached_data()
+        # Функция сама определит источник (БД или CSV).
+        # Сразу строим и массивы колонок для фуззи-поиска
+        _get_fuzzy_columns(_get_cached_data())
         print("✓ Данные успешно загружены")
     except Exception as e:
         print(f"⚠ Ошибка при предзагрузке данных: {e}")
         print("Данные будут загружены при первом запросе")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Загрузка данных идёт в фоновом потоке, поэтому uvicorn сразу начинает
+    принимать соединения (например, отдаёт "/" и health-check),
+    а эндпоинты геокодирования дожидаются окончания загрузки.
+    """
+    print("Предзагрузка данных...")
+    app.state.data_ready = asyncio.create_task(asyncio.to_thread(_preload_data))
+    yield
+
+
+async def _wait_for_data() -> None:
+    """Дожидается фоновой предзагрузки данных (если она запущена)."""
+    data_ready = getattr(app.state, "data_ready", None)
+    if data_ready is not None:
+        await data_ready
+
+
+app = FastAPI(
+    title="Геокодер адресов Москвы",
+    description="API для геокодирования адресов по данным OpenStreetMap",
+    version="0.1.0",
+    lifespan=lifespan
+)
+
+# Путь к статическим файлам
+STATIC_DIR = Path(__file__).parent.parent / "static"
+STATIC_DIR.mkdir(exist_ok=True)
+
+# Подключаем статические файлы
+app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+
+
 @app.get("/")
 async def root():
     """Корневой эндпоинт - возвращает HTML интерфейс."""
@@ -87,6 +108,7 @@ async def geocode_basic_endpoint(
     Выполняет точное сопоставление по нормализованным полям.
     """
     try:
+        await _wait_for_data()
         result = geocode_basic(address, limit=limit)
         # Используем Response с json.dumps для поддержки ensure_ascii=False
         return Response(
@@ -120,6 +142,7 @@ async def geocode_improved_endpoint(
     Использует фуззи-поиск по улицам и умное сравнение номеров домов.
     """
     try:
+        await _wait_for_data()
         result = geocode_improved(address, limit=limit, debug=debug)
         # Используем Response с json.dumps для поддержки ensure_ascii=False
         return Response(
@@ -8,6 +8,11 @@ from pathlib import Path
 # Путь к исходным данным
 DATA_PATH = Path(__file__).parent.parent / "moscow_buildings.csv"
 
+# Кэш уже нормализованных данных (Parquet). Создаётся при первой загрузке CSV
+# и пересоздаётся, если CSV новее кэша. Отдельное имя, чтобы не совпасть
+# с выгрузкой preprocessing в `moscow_buildings.parquet`.
+NORMALIZED_CACHE_PATH = DATA_PATH.with_name(DATA_PATH.stem + ".normalized.parquet")
+
 # Флаги использования базы данных.
 # По умолчанию БД выключена, чтобы локальный запуск работал "из коробки"
 # только с CSV-файлом `moscow_buildings.csv`.
@@ -24,6 +29,8 @@ HOUSE_NUMBER_DISTANCE_BETA = 3.0  # Уменьшаем для более рез
 SCORE_STREET_WEIGHT = 0.25  # Вес улицы, если номер не указан
 SCORE_NUMBER_WEIGHT = 0.75  # Вес номера, если номер не указан
 # Если номер указан: используются адаптивные веса в зависимости от похожести улицы
+GEOCODE_CACHE_SIZE = 4096  # Размер LRU-кэша результатов геокодирования по запросу
+COORD_DECIMALS = 7  # Знаков после запятой в координатах ответа (как в OSM); lon/lat хранятся в float32
 
 # Параметры для оценки
 EVALUATION_SAMPLE_SIZE = 500
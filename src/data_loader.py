@@ -8,7 +8,7 @@ from typing import Optional
 
 import pandas as pd
 
-from .config import DATA_PATH
+from .config import DATA_PATH, NORMALIZED_CACHE_PATH
 
 
 @dataclass
@@ -30,12 +30,13 @@ class BuildingRecord:
 def load_buildings_csv(path: str | Path = None) -> pd.DataFrame:
     """
     Загружает CSV с зданиями Москвы и возвращает DataFrame.
+    Файл с расширением .parquet (выгрузка preprocessing) читается через pyarrow.
     
     Приводит колонки к стандартным именам:
     - osm_id, city, street, housenumber, lon, lat
     
     Args:
-        path: Путь к CSV файлу. Если None, используется DATA_PATH из config.
+        path: Путь к CSV (или Parquet) файлу. Если None, используется DATA_PATH из config.
         
     Returns:
         DataFrame с нормализованными колонками.
@@ -47,7 +48,10 @@ def load_buildings_csv(path: str | Path = None) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"Файл данных не найден: {path}")
     
-    df = pd.read_csv(path)
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path, engine='pyarrow')
+    else:
+        df = pd.read_csv(path)
     
     # Проверяем наличие необходимых колонок
     required_cols = ['osm_id', 'city', 'street', 'housenumber', 'lon', 'lat']
@@ -68,3 +72,54 @@ def load_buildings_csv(path: str | Path = None) -> pd.DataFrame:
     
     return df
 
+
+
+def load_normalized_cache(
+    path: str | Path = None,
+    source_path: str | Path = None
+) -> Optional[pd.DataFrame]:
+    """
+    Загружает кэш нормализованных данных из Parquet.
+    
+    Колоночный бинарный формат читается в разы быстрее CSV и уже содержит
+    нормализованные колонки, поэтому add_normalized_columns не нужен.
+    
+    Args:
+        path: Путь к Parquet-кэшу. Если None, используется NORMALIZED_CACHE_PATH.
+        source_path: Исходный CSV. Если он новее кэша, кэш считается устаревшим.
+        
+    Returns:
+        DataFrame или None, если кэша нет, он устарел или не читается.
+    """
+    path = Path(path if path is not None else NORMALIZED_CACHE_PATH)
+    source_path = Path(source_path if source_path is not None else DATA_PATH)
+    
+    if not path.exists():
+        return None
+    if source_path.exists() and source_path.stat().st_mtime > path.stat().st_mtime:
+        return None
+    
+    try:
+        return pd.read_parquet(path, engine='pyarrow')
+    except Exception as e:
+        # Нет pyarrow или файл повреждён - просто загрузим CSV заново
+        print(f"Не удалось прочитать кэш {path}: {e}")
+        return None
+
+
+def save_normalized_cache(df: pd.DataFrame, path: str | Path = None) -> None:
+    """
+    Сохраняет нормализованные данные в Parquet-кэш (zstd).
+    
+    Ошибки записи не критичны: без кэша данные просто будут
+    нормализованы заново при следующем запуске.
+    
+    Args:
+        df: DataFrame с нормализованными колонками
+        path: Путь к Parquet-кэшу. Если None, используется NORMALIZED_CACHE_PATH.
+    """
+    path = Path(path if path is not None else NORMALIZED_CACHE_PATH)
+    try:
+        df.to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+    except Exception as e:
+        print(f"Не удалось сохранить кэш {path}: {e}")
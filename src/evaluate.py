@@ -6,7 +6,14 @@ import math
 import random
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
+from rapidfuzz.distance import Levenshtein
+
+try:
+    from numba import njit
+except ImportError:  # numba опционален: без него используется NumPy-версия
+    njit = None
 
 from .data_loader import load_buildings_csv
 from .normalize import add_normalized_columns, build_full_norm
@@ -15,36 +22,6 @@ from .geocode_improved import geocode_improved
 from .config import EVALUATION_SAMPLE_SIZE
 
 
-def levenshtein_distance(s1: str, s2: str) -> int:
-    """
-    Вычисляет расстояние Левенштейна между двумя строками.
-    
-    Args:
-        s1: Первая строка
-        s2: Вторая строка
-        
-    Returns:
-        Расстояние Левенштейна
-    """
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-    
-    if len(s2) == 0:
-        return len(s1)
-    
-    previous_row = list(range(len(s2) + 1))
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    
-    return previous_row[-1]
-
-
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Вычисляет расстояние по формуле Haversine между двумя точками на Земле.
@@ -78,9 +55,84 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return distance
 
 
+# Радиус Земли в метрах (как в haversine_distance)
+EARTH_RADIUS_M = 6371000.0
+
+
+def _haversine_numpy(lat1, lon1, lat2, lon2) -> np.ndarray:
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = np.radians(lat2 - lat1)
+    delta_lambda = np.radians(lon2 - lon1)
+
+    a = (
+        np.sin(delta_phi / 2) ** 2 +
+        np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+
+if njit is not None:
+    # Без parallel=True: на выборке оценки (сотни пар) запуск потоков
+    # дороже самого расчёта, а скомпилированный код кэшируется на диске
+    @njit(fastmath=True, cache=True)
+    def _haversine_numba(lat1, lon1, lat2, lon2):
+        n = lat1.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            phi1 = math.radians(lat1[i])
+            phi2 = math.radians(lat2[i])
+            delta_phi = math.radians(lat2[i] - lat1[i])
+            delta_lambda = math.radians(lon2[i] - lon1[i])
+            a = (
+                math.sin(delta_phi / 2) ** 2 +
+                math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+            )
+            out[i] = EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return out
+else:
+    _haversine_numba = None
+
+
+def haversine_batch(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Векторная версия haversine_distance для массивов координат.
+    
+    Считается одним вызовом: через numba (если установлена) или NumPy.
+    Пары, где хотя бы одна координата отсутствует (NaN), дают NaN.
+    
+    Args:
+        lat1: Широты первых точек
+        lon1: Долготы первых точек
+        lat2: Широты вторых точек
+        lon2: Долготы вторых точек
+        
+    Returns:
+        Массив расстояний в метрах
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.asarray(x, dtype=np.float64) for x in (lat1, lon1, lat2, lon2)
+    )
+    
+    # fastmath в numba предполагает отсутствие NaN, поэтому считаем только валидные пары
+    valid = np.isfinite(lat1) & np.isfinite(lon1) & np.isfinite(lat2) & np.isfinite(lon2)
+    distances = np.full(lat1.shape, np.nan)
+    
+    args = tuple(np.ascontiguousarray(x[valid]) for x in (lat1, lon1, lat2, lon2))
+    if _haversine_numba is not None:
+        distances[valid] = _haversine_numba(*args)
+    else:
+        distances[valid] = _haversine_numpy(*args)
+    return distances
+
+
 def text_similarity_score(pred: str, true: str) -> float:
     """
-    Вычисляет текстовый score схожести адресов.
+    Вычисляет текстовый score схожести адресов:
+    1 - (расстояние Левенштейна / длина более длинной строки).
+    
+    Расстояние считает RapidFuzz (C++, битово-параллельный алгоритм).
     
     Args:
         pred: Предсказанный нормализованный адрес
@@ -95,13 +147,7 @@ def text_similarity_score(pred: str, true: str) -> float:
     if not pred or not true:
         return 0.0
     
-    max_len = max(len(pred), len(true))
-    if max_len == 0:
-        return 1.0
-    
-    lev_dist = levenshtein_distance(pred, true)
-    score = 1 - (lev_dist / max_len)
-    return max(0.0, score)
+    return Levenshtein.normalized_similarity(pred, true)
 
 
 def evaluate_single_query(
@@ -111,11 +157,16 @@ def evaluate_single_query(
     true_number: str,
     true_lat: float,
     true_lon: float,
-    true_full_norm: str
+    true_full_norm: str,
+    compute_distances: bool = True
 ) -> Dict[str, any]:
     """
     Оценивает качество геокодирования для одного запроса.
     
+    Если compute_distances=False, геодистанции не считаются (остаются None),
+    а предсказанные координаты возвращаются для пакетного расчёта
+    через haversine_batch.
+    
     Args:
         query: Текст запроса
         true_city: Истинный город
@@ -124,6 +175,7 @@ def evaluate_single_query(
         true_lat: Истинная широта
         true_lon: Истинная долгота
         true_full_norm: Истинный нормализованный адрес
+        compute_distances: Считать ли геодистанции сразу
         
     Returns:
         Словарь с метриками для basic и improved геокодеров
@@ -144,13 +196,17 @@ def evaluate_single_query(
             basic_obj['number']
         )
         basic_text_score = text_similarity_score(basic_pred_full_norm, true_full_norm)
+        basic_pred_lat = basic_obj['lat']
+        basic_pred_lon = basic_obj['lon']
         basic_dist_m = haversine_distance(
             true_lat, true_lon,
-            basic_obj['lat'], basic_obj['lon']
-        )
+            basic_pred_lat, basic_pred_lon
+        ) if compute_distances else None
     else:
         basic_pred_full_norm = ''
         basic_text_score = 0.0
+        basic_pred_lat = None
+        basic_pred_lon = None
         basic_dist_m = None
     
     # Обработка результатов improved
@@ -161,13 +217,17 @@ def evaluate_single_query(
             improved_obj['number']
         )
         improved_text_score = text_similarity_score(improved_pred_full_norm, true_full_norm)
+        improved_pred_lat = improved_obj['lat']
+        improved_pred_lon = improved_obj['lon']
         improved_dist_m = haversine_distance(
             true_lat, true_lon,
-            improved_obj['lat'], improved_obj['lon']
-        )
+            improved_pred_lat, improved_pred_lon
+        ) if compute_distances else None
     else:
         improved_pred_full_norm = ''
         improved_text_score = 0.0
+        improved_pred_lat = None
+        improved_pred_lon = None
         improved_dist_m = None
     
     return {
@@ -177,9 +237,13 @@ def evaluate_single_query(
         'true_lon': true_lon,
         'basic_pred_full_norm': basic_pred_full_norm,
         'basic_text_score': basic_text_score,
+        'basic_pred_lat': basic_pred_lat,
+        'basic_pred_lon': basic_pred_lon,
         'basic_dist_m': basic_dist_m,
         'improved_pred_full_norm': improved_pred_full_norm,
         'improved_text_score': improved_text_score,
+        'improved_pred_lat': improved_pred_lat,
+        'improved_pred_lon': improved_pred_lon,
         'improved_dist_m': improved_dist_m,
     }
 
@@ -225,13 +289,24 @@ def main():
             true_number=str(row['housenumber']),
             true_lat=float(row['lat']),
             true_lon=float(row['lon']),
-            true_full_norm=str(row['full_norm'])
+            true_full_norm=str(row['full_norm']),
+            compute_distances=False
         )
         
         results.append(result)
     
-    # Сохраняем результаты
     results_df = pd.DataFrame(results)
+    
+    # Геодистанции считаем одним пакетным вызовом на каждый геокодер
+    for prefix in ('basic', 'improved'):
+        results_df[f'{prefix}_dist_m'] = haversine_batch(
+            results_df['true_lat'],
+            results_df['true_lon'],
+            pd.to_numeric(results_df[f'{prefix}_pred_lat']),
+            pd.to_numeric(results_df[f'{prefix}_pred_lon'])
+        )
+    
+    # Сохраняем результаты
     results_df.to_csv('evaluation_results.csv', index=False, encoding='utf-8')
     print(f"\nРезультаты сохранены в evaluation_results.csv")
     
@@ -6,20 +6,28 @@
 import pandas as pd
 from typing import Dict, List, Any, Optional
 
-from .config import USE_DATABASE, DATA_PATH
-from .data_loader import load_buildings_csv
+from .config import USE_DATABASE, DATA_PATH, COORD_DECIMALS
+from .data_loader import load_buildings_csv, load_normalized_cache, save_normalized_cache
 from .normalize import (
     norm_city,
     norm_street,
     norm_number,
     add_normalized_columns,
-    build_full_norm
+    add_number_part_columns,
+    build_full_norm,
+    to_categorical_columns,
+    NUMBER_PART_COLUMNS
 )
 
 # Глобальный кэш данных
 _cached_df: pd.DataFrame | None = None
 _db_available: Optional[bool] = None
 
+# Hash-индексы по нормализованным колонкам (см. _get_norm_index)
+NORM_COLUMNS = ('city_norm', 'street_norm', 'number_norm')
+_norm_indexes: Dict[tuple, dict] = {}
+_norm_indexes_df: pd.DataFrame | None = None
+
 
 def _check_db_available() -> bool:
     """Проверяет, доступна ли база данных."""
@@ -53,13 +61,68 @@ def _check_db_available() -> bool:
         return False
 
 
+def _get_norm_index(df: pd.DataFrame, columns: tuple) -> dict:
+    """
+    Возвращает hash-индекс по набору нормализованных колонок.
+    
+    Индекс - словарь "значение колонки (или кортеж значений) -> массив позиций
+    строк в df" в порядке следования строк. Поиск точного совпадения
+    становится одним обращением к словарю вместо сравнения всех строк.
+    Индекс строится при первом обращении и кэшируется для данного df.
+    
+    Args:
+        df: DataFrame с нормализованными колонками
+        columns: Кортеж имён колонок из NORM_COLUMNS
+        
+    Returns:
+        Словарь ключ -> np.ndarray позиций строк
+    """
+    global _norm_indexes, _norm_indexes_df
+    if _norm_indexes_df is not df:
+        _norm_indexes = {}
+        _norm_indexes_df = df
+    
+    index = _norm_indexes.get(columns)
+    if index is None:
+        index = df.groupby(list(columns), sort=False, observed=True).indices
+        _norm_indexes[columns] = index
+    return index
+
+
+def _column_values(df: pd.DataFrame, column: str) -> list:
+    """
+    Значения колонки списком; если колонки нет в источнике, - список None.
+    Наличие колонки проверяется один раз, а не для каждой строки.
+    """
+    if column in df.columns:
+        return df[column].tolist()
+    return [None] * len(df)
+
+
+def _prepare_loaded(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Доводит загруженные нормализованные данные до вида, нужного геокодерам:
+    категориальные колонки, координаты в float32, разобранные номера домов (если их нет в источнике),
+    hash-индекс по полному адресу (город + улица + номер) и по паре
+    город + улица (кандидаты фуззи-поиска).
+    """
+    df = to_categorical_columns(df)
+    df[['lon', 'lat']] = df[['lon', 'lat']].astype('float32')
+    if not set(NUMBER_PART_COLUMNS).issubset(df.columns):
+        df = add_number_part_columns(df)
+    _get_norm_index(df, NORM_COLUMNS)
+    _get_norm_index(df, ("city_norm", "street_norm"))
+    return df
+
+
 def _get_cached_data() -> pd.DataFrame:
     """
     Загружает и кэширует нормализованные данные.
     
     Приоритет:
     1. Если USE_DATABASE=True и БД доступна - загружает из БД (быстрее с индексами)
-    2. Иначе - загружает из CSV и нормализует
+    2. Parquet-кэш уже нормализованных данных (если он не старше CSV)
+    3. Иначе - загружает из CSV, нормализует и сохраняет Parquet-кэш
     """
     global _cached_df
     if _cached_df is not None:
@@ -70,18 +133,27 @@ def _get_cached_data() -> pd.DataFrame:
         try:
             from .database import load_from_db
             print("Загрузка данных из базы данных...")
-            _cached_df = load_from_db()
+            _cached_df = _prepare_loaded(load_from_db())
             print(f"[OK] Загружено {len(_cached_df)} записей из БД")
             return _cached_df
         except Exception as e:
             print(f"Ошибка загрузки из БД, используем CSV: {e}")
     
+    # Parquet-кэш нормализованных данных
+    cached = load_normalized_cache()
+    if cached is not None:
+        # Категориальные колонки сохраняются в Parquet как есть
+        _cached_df = _prepare_loaded(cached)
+        print(f"[OK] Загружено {len(_cached_df)} нормализованных записей из кэша")
+        return _cached_df
+    
     # Fallback на CSV
     print("Загрузка данных из CSV...")
     df = load_buildings_csv()
     print(f"Загружено {len(df)} записей. Нормализация...")
-    _cached_df = add_normalized_columns(df)
+    _cached_df = _prepare_loaded(add_normalized_columns(df))
     print(f"[OK] Нормализация завершена. Всего записей: {len(_cached_df)}")
+    save_normalized_cache(_cached_df)
     return _cached_df
 
 
@@ -93,6 +165,9 @@ def geocode_basic(query: str, limit: int = 5) -> Dict[str, Any]:
       3) делает точный фильтр по нормализованным колонкам,
       4) возвращает топ-N совпадений в формате JSON из условия.
     
+    Если после нормализации все компоненты пустые, возвращает пустой
+    список objects.
+    
     Args:
         query: Строка запроса (например, "Москва, Тверская улица, 12к1")
         limit: Максимальное количество результатов
@@ -102,18 +177,25 @@ def geocode_basic(query: str, limit: int = 5) -> Dict[str, Any]:
         - searched_address: исходный запрос
         - objects: список найденных объектов
     """
-    # Парсинг запроса
-    parts = [p.strip() for p in query.split(',')]
+    # Парсинг запроса: нужны только первые три части, остальное не разбиваем
+    parts = query.split(',', 3)
     
-    city_raw = parts[0] if len(parts) > 0 else ''
-    street_raw = parts[1] if len(parts) > 1 else ''
-    number_raw = parts[2] if len(parts) > 2 else ''
+    city_raw = parts[0].strip()
+    street_raw = parts[1].strip() if len(parts) > 1 else ''
+    number_raw = parts[2].strip() if len(parts) > 2 else ''
     
     # Нормализация
     city_norm = norm_city(city_raw)
     street_norm = norm_street(street_raw)
     number_norm = norm_number(number_raw)
     
+    # Пустой запрос: фильтровать не по чему, точных совпадений нет
+    if not (city_norm or street_norm or number_norm):
+        return {
+            "searched_address": query,
+            "objects": []
+        }
+    
     # Пробуем использовать БД для точного поиска (быстрее с индексами)
     use_db_results = False
     if _check_db_available():
@@ -136,28 +218,47 @@ def geocode_basic(query: str, limit: int = 5) -> Dict[str, Any]:
     # Если БД недоступна или поиск не дал результатов - используем pandas
     if not use_db_results:
         df = _get_cached_data()
-        # Фильтрация
-        mask = pd.Series(True, index=df.index)
-        if city_norm:
-            mask = mask & (df['city_norm'] == city_norm)
-        if street_norm:
-            mask = mask & (df['street_norm'] == street_norm)
-        if number_norm:
-            mask = mask & (df['number_norm'] == number_norm)
-        results_df = df[mask].head(limit)
-    
-    # Формирование ответа
+        # Фильтрация по hash-индексу из заданных компонентов запроса
+        query_parts = [
+            (column, value)
+            for column, value in zip(NORM_COLUMNS, (city_norm, street_norm, number_norm))
+            if value
+        ]
+        columns = tuple(column for column, _ in query_parts)
+        values = tuple(value for _, value in query_parts)
+        index = _get_norm_index(df, columns)
+        positions = index.get(values if len(values) > 1 else values[0])
+        if positions is None:
+            results_df = df.iloc[:0]
+        else:
+            results_df = df.iloc[positions[:limit]]
+    
+    # Формирование ответа: идём по колонкам, без построения Series на каждую строку
+    cities = [str(v) if v else '' for v in _column_values(results_df, 'city')]
+    streets = [str(v) if v else '' for v in _column_values(results_df, 'street')]
+    numbers = [str(v) if v else '' for v in _column_values(results_df, 'housenumber')]
+    lons = results_df['lon'].tolist()
+    lats = results_df['lat'].tolist()
+    
+    # Нормализованные колонки уже посчитаны при загрузке данных -
+    # переиспользуем их вместо повторной нормализации сырых значений
+    if {'city_norm', 'street_norm', 'number_norm'}.issubset(results_df.columns):
+        city_norms = results_df['city_norm'].tolist()
+        street_norms = results_df['street_norm'].tolist()
+        number_norms = results_df['number_norm'].tolist()
+    else:
+        city_norms = [norm_city(v) for v in cities]
+        street_norms = [norm_street(v) for v in streets]
+        number_norms = [norm_number(v) for v in numbers]
+    
     objects = []
-    for _, row in results_df.iterrows():
+    for city_val, street_val, number_val, city_norm_val, street_norm_val, number_norm_val, lon, lat in zip(
+        cities, streets, numbers, city_norms, street_norms, number_norms, lons, lats
+    ):
         # Собираем нормализованный адрес в формате организаторов
-        city_val = str(row['city']) if row.get('city') else ''
-        street_val = str(row['street']) if row.get('street') else ''
-        number_val = str(row['housenumber']) if row.get('housenumber') else ''
-        
-        # Нормализуем для формирования полного адреса
-        city_norm_val = norm_city(city_val) if city_val else 'москва'
-        street_norm_val = norm_street(street_val) if street_val else ''
-        number_norm_val = norm_number(number_val) if number_val else ''
+        city_norm_val = city_norm_val if city_val else 'москва'
+        street_norm_val = street_norm_val if street_val else ''
+        number_norm_val = number_norm_val if number_val else ''
         
         # Формируем нормализованный адрес в требуемом формате
         normalized_address = build_full_norm(
@@ -172,8 +273,8 @@ def geocode_basic(query: str, limit: int = 5) -> Dict[str, Any]:
             "street": street_val,
             "number": number_val,
             "normalized_address": normalized_address,  # Нормализованный адрес в формате организаторов
-            "lon": float(row['lon']),
-            "lat": float(row['lat']),
+            "lon": round(float(lon), COORD_DECIMALS),
+            "lat": round(float(lat), COORD_DECIMALS),
             "score": 1.0  # Для baseline всегда 1.0
         })
     
@@ -2,22 +2,31 @@
 Улучшенный геокодер с фуззи-поиском и умным скорингом.
 """
 
-import math
-import re
+import copy
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Any
 
+import numpy as np
 import pandas as pd
 from rapidfuzz import fuzz, process
 
 from .data_loader import load_buildings_csv
+from .geocode_basic import _column_values, _get_norm_index, _prepare_loaded
 from .normalize import (
     norm_city,
     norm_street,
     norm_number,
     parse_house_number_full,
+    clamp_house_number,
     add_normalized_columns,
     build_full_norm,
-    HouseNumberParsed
+    HouseNumberParsed,
+    STREET_TYPES,
+    NUMBER_PART_COLUMNS,
+    NUMBER_PART_MISSING,
+    _number_part_values
 )
 from .config import (
     FUZZY_MATCH_MIN_SCORE,
@@ -25,12 +34,21 @@ from .config import (
     HOUSE_NUMBER_DISTANCE_BETA,
     SCORE_STREET_WEIGHT,
     SCORE_NUMBER_WEIGHT,
+    GEOCODE_CACHE_SIZE,
+    COORD_DECIMALS,
     USE_DATABASE
 )
 
 # Глобальный кэш данных
 _cached_df: pd.DataFrame | None = None
 
+# Индексы улиц по городам для фуззи-поиска (см. _get_city_streets)
+_city_streets: Dict[str, "CityStreets"] = {}
+_city_streets_df: pd.DataFrame | None = None
+# Колонки данных в виде массивов для фуззи-поиска (см. _get_fuzzy_columns)
+_fuzzy_columns: "FuzzyColumns | None" = None
+_fuzzy_columns_df: pd.DataFrame | None = None
+
 
 def _get_cached_data() -> pd.DataFrame:
     """
@@ -60,17 +78,24 @@ def _get_cached_data() -> pd.DataFrame:
     if USE_DATABASE:
         try:
             from .database import load_from_db
-            _cached_df = load_from_db()
+            _cached_df = _prepare_loaded(load_from_db())
             return _cached_df
         except:
             pass
     
     # Последний fallback: CSV
     df = load_buildings_csv()
-    _cached_df = add_normalized_columns(df)
+    _cached_df = _prepare_loaded(add_normalized_columns(df))
     return _cached_df
 
 
+# Сокращения и слова, которые могут стоять внутри номера дома ("14 с 1", "12 корпус 1")
+_NUMBER_WORDS = frozenset(('с', 'к', 'корп', 'стр', 'корпус', 'строение', 'литер', 'лит'))
+# Одиночные буквы-литеры номера ("12 а")
+_NUMBER_LETTERS = frozenset('абвгдеёжзийклмнопрстуфхцчшщъыьэюяabcdefghijklmnopqrstuvwxyz')
+
+
+@lru_cache(maxsize=GEOCODE_CACHE_SIZE)
 def parse_address(query: str) -> tuple[str, str, str]:
     """
     Парсит адресный запрос на компоненты.
@@ -145,16 +170,16 @@ def parse_address(query: str) -> tuple[str, str, str]:
             is_number_part = False
             
             # 1. Токен с цифрами - основная часть номера
-            if re.search(r'\d', token):
+            if any(ch.isdecimal() for ch in token):
                 is_number_part = True
                 found_digit_token = True
                 number_start_idx = i
             # 2. Короткие сокращения (после цифр): с, к, стр, корп
             elif found_digit_token and len(token_lower) <= 4:
-                if token_lower in ['с', 'к', 'корп', 'стр', 'корпус', 'строение', 'литер', 'лит']:
+                if token_lower in _NUMBER_WORDS:
                     is_number_part = True
             # 3. Одна буква (литера): а, б, в, г...
-            elif found_digit_token and len(token_lower) == 1 and re.match(r'^[а-яёa-z]$', token_lower):
+            elif found_digit_token and len(token_lower) == 1 and token_lower in _NUMBER_LETTERS:
                 is_number_part = True
             
             if is_number_part:
@@ -185,78 +210,216 @@ def parse_address(query: str) -> tuple[str, str, str]:
     return city_raw, street_raw, number_raw
 
 
-def house_number_distance(q: HouseNumberParsed, c: HouseNumberParsed) -> float:
+def house_number_distances(q: HouseNumberParsed, parts: Dict[str, np.ndarray]) -> np.ndarray:
     """
-    Вычисляет числовую "дистанцию" между номерами домов.
+    Вычисляет числовую "дистанцию" от номера запроса сразу до всех кандидатов.
     
-    Улучшенная версия:
-    - Если base отличается, штраф нелинейный (логарифмический для небольших различий)
+    - Если base отличается, штраф растёт с разницей (соседний дом - небольшой)
     - Более мягкие штрафы за отсутствие опциональных компонентов (corpus, building)
     - Полное совпадение = 0
     
     Args:
         q: Номер из запроса
-        c: Номер кандидата
+        parts: Колонки NUMBER_PART_COLUMNS кандидатов (-1 - компонента нет)
         
     Returns:
-        Числовая дистанция
+        Массив дистанций (float64)
     """
-    distance = 0.0
-    
-    # Основной номер - самый важный
-    if q.base is not None and c.base is not None:
-        base_diff = abs(q.base - c.base)
-        if base_diff == 0:
-            distance += 0  # Полное совпадение
-        elif base_diff == 1:
-            distance += 5  # Соседние дома - небольшой штраф
-        else:
-            # Для больших различий - линейный штраф
-            distance += 10 + 5 * base_diff
-    elif q.base is not None or c.base is not None:
-        # Если один есть, а другого нет - очень большой штраф
-        distance += 200
-    
-    # Корпус - важный, но не критичный
-    if q.corpus is not None and c.corpus is not None:
-        distance += 5 * abs(q.corpus - c.corpus)
-    elif q.corpus is not None or c.corpus is not None:
-        # Если запрос имеет корпус, а кандидат нет - штраф
-        if q.corpus is not None:
-            distance += 30  # Запрошен корпус, но его нет
-        else:
-            distance += 5  # Корпус есть, но не запрашивался (меньший штраф)
-    
-    # Строение - менее важное
-    if q.building is not None and c.building is not None:
-        distance += 3 * abs(q.building - c.building)
-    elif q.building is not None or c.building is not None:
-        # Если запрос имеет строение, а кандидат нет - штраф
-        if q.building is not None:
-            distance += 20  # Запрошено строение, но его нет
-        else:
-            # Строение есть, но не запрашивалось - это нормально (пользователь может не указать)
-            # Если base совпадает, строение не должно сильно снижать score
-            if q.base is not None and c.base is not None and q.base == c.base:
-                # Base совпадает - строение не критично
-                distance += 3  # Минимальный штраф
-            else:
-                distance += 8  # Обычный штраф для строений
-    
-    # Литера - наименее важная
-    if q.letter is not None and c.letter is not None:
-        if q.letter != c.letter:
-            distance += 2
-    elif q.letter is not None or c.letter is not None:
-        # Если запрос имеет литеру, а кандидат нет - небольшой штраф
-        if q.letter is not None:
-            distance += 10
-        else:
-            distance += 1
+    base = parts["number_base"].astype(np.float64)
+    corpus = parts["number_corpus"].astype(np.float64)
+    building = parts["number_building"].astype(np.float64)
+    letter = parts["number_letter"]
+    
+    base_missing = base == NUMBER_PART_MISSING
+    corpus_missing = corpus == NUMBER_PART_MISSING
+    building_missing = building == NUMBER_PART_MISSING
+    letter_missing = letter == NUMBER_PART_MISSING
+    
+    # Основной номер: 0 / 5 за соседний дом / 10 + 5 * разница; 200, если есть только с одной стороны
+    if q.base is not None:
+        base_diff = np.abs(float(q.base) - base)
+        base_penalty = np.select([base_diff == 0, base_diff == 1], [0.0, 5.0], 10 + 5 * base_diff)
+        distance = np.where(base_missing, 200.0, base_penalty)
+    else:
+        distance = np.where(base_missing, 0.0, 200.0)
+    
+    # Корпус
+    if q.corpus is not None:
+        distance += np.where(corpus_missing, 30.0, 5 * np.abs(float(q.corpus) - corpus))
+    else:
+        distance += np.where(corpus_missing, 0.0, 5.0)
+    
+    # Строение
+    if q.building is not None:
+        distance += np.where(building_missing, 20.0, 3 * np.abs(float(q.building) - building))
+    else:
+        same_base = base == float(q.base) if q.base is not None else False
+        distance += np.where(building_missing, 0.0, np.where(same_base, 3.0, 8.0))
+    
+    # Литера
+    if q.letter is not None:
+        distance += np.where(letter_missing, 10.0, np.where(letter != ord(q.letter), 2.0, 0.0))
+    else:
+        distance += np.where(letter_missing, 0.0, 1.0)
     
     return distance
 
 
+def house_number_scores(distances: np.ndarray) -> np.ndarray:
+    """
+    Переводит дистанции номеров в score (экспоненциальное убывание),
+    полное совпадение = 1.0.
+    """
+    return np.where(distances == 0, 1.0, np.exp(-distances / HOUSE_NUMBER_DISTANCE_BETA))
+
+
+@dataclass
+class FuzzyColumns:
+    """
+    Колонки, которые читает фуззи-поиск, в виде массивов
+    (structure of arrays). Индекс в массиве - позиция строки в df, поэтому
+    кандидаты и результаты выбираются индексацией массивов без DataFrame.
+    """
+    number_parts: Dict[str, np.ndarray]
+    lon: np.ndarray
+    lat: np.ndarray
+    city: np.ndarray
+    street: np.ndarray
+    housenumber: np.ndarray
+    street_norm_codes: np.ndarray
+    street_norm_categories: pd.Index
+    number_norm: pd.api.extensions.ExtensionArray
+
+
+def _get_fuzzy_columns(df: pd.DataFrame) -> FuzzyColumns:
+    """
+    Возвращает массивы колонок df для фуззи-поиска. Строятся один раз
+    и кэшируются для данного df.
+    """
+    global _fuzzy_columns, _fuzzy_columns_df
+    if _fuzzy_columns_df is not df:
+        # Сырых колонок адреса может не быть в источнике - это проверяется один раз
+        _fuzzy_columns = FuzzyColumns(
+            number_parts={column: df[column].to_numpy() for column in NUMBER_PART_COLUMNS},
+            lon=df["lon"].to_numpy(),
+            lat=df["lat"].to_numpy(),
+            city=np.array(_column_values(df, "city"), dtype=object),
+            street=np.array(_column_values(df, "street"), dtype=object),
+            housenumber=np.array(_column_values(df, "housenumber"), dtype=object),
+            # street_norm - коды категорий, строки улиц хранятся один раз;
+            # number_norm - сама колонка (Arrow), без копии в объекты Python
+            street_norm_codes=df["street_norm"].cat.codes.to_numpy(),
+            street_norm_categories=df["street_norm"].cat.categories,
+            number_norm=df["number_norm"].array,
+        )
+        _fuzzy_columns_df = df
+    return _fuzzy_columns
+
+
+@dataclass
+class CityStreets:
+    """
+    Уникальные улицы города и индекс символов для префильтра фуззи-поиска.
+    
+    char_counts[i, char_ids[c]] - сколько раз символ c встречается в streets[i].
+    """
+    streets: tuple
+    lengths: np.ndarray
+    char_ids: Dict[str, int]
+    char_counts: np.ndarray
+
+
+def _build_city_streets(streets: tuple) -> CityStreets:
+    char_ids: Dict[str, int] = {}
+    for street in streets:
+        for char in street:
+            char_ids.setdefault(char, len(char_ids))
+    
+    char_counts = np.zeros((len(streets), len(char_ids)), dtype=np.int32)
+    for i, street in enumerate(streets):
+        for char, count in Counter(street).items():
+            char_counts[i, char_ids[char]] = count
+    
+    return CityStreets(
+        streets=streets,
+        lengths=np.fromiter((len(street) for street in streets), dtype=np.int64, count=len(streets)),
+        char_ids=char_ids,
+        char_counts=char_counts,
+    )
+
+
+def _get_city_streets(df: pd.DataFrame, city_rows: np.ndarray, city_norm: str) -> CityStreets:
+    """
+    Возвращает уникальные улицы города (в порядке первого появления среди
+    строк города) вместе с индексом символов. Строится при первом запросе
+    по городу и кэшируется для данного df.
+    
+    Args:
+        df: Все данные геокодера
+        city_rows: Позиции строк города в df
+        city_norm: Нормализованный город ('' - без фильтра по городу)
+    """
+    global _city_streets, _city_streets_df
+    if _city_streets_df is not df:
+        _city_streets = {}
+        _city_streets_df = df
+    
+    city_streets = _city_streets.get(city_norm)
+    if city_streets is None:
+        # Уникальные улицы ищем по целочисленным кодам категорий
+        street_col = df["street_norm"]
+        codes = pd.unique(street_col.cat.codes.to_numpy()[city_rows])
+        city_streets = _build_city_streets(
+            tuple(street_col.cat.categories.take(codes[codes >= 0]).tolist())
+        )
+        _city_streets[city_norm] = city_streets
+    return city_streets
+
+
+def _street_candidates(q_street_norm: str, city_streets: CityStreets, min_score: float) -> List[str]:
+    """
+    Улицы, у которых fuzz.QRatio с запросом может достичь min_score.
+    
+    QRatio = 200 * LCS / (len(q) + len(s)), а длина общей подпоследовательности
+    не больше суммы по символам min(count_q, count_s). Улицы, у которых эта
+    оценка сверху ниже порога, отбрасываются без вызова RapidFuzz, поэтому
+    результат process.extract с тем же score_cutoff не меняется.
+    Порядок улиц сохраняется (важно для равных score).
+    """
+    q_counts = Counter(q_street_norm)
+    columns = [city_streets.char_ids[char] for char in q_counts if char in city_streets.char_ids]
+    counts = [q_counts[char] for char in q_counts if char in city_streets.char_ids]
+    
+    overlap = np.minimum(city_streets.char_counts[:, columns], counts).sum(axis=1)
+    upper_bound = 200 * overlap / (len(q_street_norm) + city_streets.lengths)
+    # Небольшой запас на округление score внутри RapidFuzz
+    keep = np.flatnonzero(upper_bound >= min_score - 1e-6)
+    return [city_streets.streets[i] for i in keep]
+
+
+def _top_positions(scores: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Позиции limit наибольших значений scores по убыванию.
+    
+    Полной сортировки нет: порог limit-го значения находится через
+    np.partition (O(N)), сортируются только прошедшие его кандидаты.
+    Равные значения идут в порядке следования, как в DataFrame.nlargest.
+    """
+    if limit <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if limit < len(scores):
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        positions = np.flatnonzero(scores >= threshold)
+    else:
+        positions = np.arange(len(scores))
+    order = np.argsort(-scores[positions], kind="stable")
+    return positions[order[:limit]]
+
+
+# Прилагательные в начале названия улицы
+_STREET_ADJECTIVES = frozenset(("большая", "малая", "новая", "старая"))
+
+
 def _decompose_street(street_norm: str) -> Dict[str, Any]:
     """
     Разбирает нормализованную улицу на компоненты:
@@ -281,27 +444,13 @@ def _decompose_street(street_norm: str) -> Dict[str, Any]:
             "street_type": None,
         }
 
-    # Возможные типы улиц (должны совпадать с normalize.STREET_TYPE_MAP)
-    street_types = {
-        "улица",
-        "проспект",
-        "проезд",
-        "переулок",
-        "бульвар",
-        "шоссе",
-        "набережная",
-        "площадь",
-        "аллея",
-        "тупик",
-    }
-
     street_type = None
-    if tokens[-1] in street_types:
+    if tokens[-1] in STREET_TYPES:
         street_type = tokens[-1]
         tokens = tokens[:-1]
 
     street_adj = None
-    if tokens and tokens[0] in {"большая", "малая", "новая", "старая"}:
+    if tokens and tokens[0] in _STREET_ADJECTIVES:
         street_adj = tokens[0]
         tokens = tokens[1:]
 
@@ -315,6 +464,79 @@ def _decompose_street(street_norm: str) -> Dict[str, Any]:
     }
 
 
+def _parsed_query_debug(query: str) -> Dict[str, Any]:
+    """
+    Блок parsed_query для debug-режима: как запрос разобран и нормализован.
+    
+    Args:
+        query: Строка запроса
+        
+    Returns:
+        Словарь с сырыми и нормализованными компонентами запроса
+    """
+    city_raw, street_raw, number_raw = parse_address(query)
+    q_street_norm = norm_street(street_raw)
+    q_number_norm = norm_number(number_raw)
+    q_number_parsed = parse_house_number_full(q_number_norm)
+    street_parts = _decompose_street(q_street_norm)
+    return {
+        "raw_city": city_raw,
+        "raw_street": street_raw,
+        "raw_number": number_raw,
+        "city_norm": norm_city(city_raw) if city_raw else "москва",
+        "street_norm": street_parts["street_norm"],
+        "street_core": street_parts["street_core"],
+        "street_adj": street_parts["street_adj"],
+        "street_type": street_parts["street_type"],
+        "number_norm": q_number_norm,
+        "number_parsed": {
+            "base": q_number_parsed.base,
+            "corp": q_number_parsed.corpus,
+            "stroenie": q_number_parsed.building,
+            "litera": q_number_parsed.letter,
+        },
+    }
+
+
+def _add_basic_objects_debug(objects: List[Dict[str, Any]], query: str) -> None:
+    """
+    Добавляет к объектам строгого поиска те же debug-блоки, что выдаёт
+    фуззи-поиск (score_decomposition и debug).
+    
+    Строгий поиск совпал по нормализованной улице, поэтому street_sim = 1.0
+    (0.5, если улица в запросе не указана - как в фуззи-поиске), а номер
+    оценивается той же house_number_distances.
+    
+    Args:
+        objects: Объекты из geocode_basic (изменяются на месте)
+        query: Строка запроса
+    """
+    _, street_raw, number_raw = parse_address(query)
+    street_sim = 1.0 if norm_street(street_raw) else 0.5
+    q_number_parsed = clamp_house_number(parse_house_number_full(norm_number(number_raw)))
+    
+    for obj in objects:
+        street_norm_val = norm_street(obj["street"]) if obj["street"] else ''
+        number_norm_val = norm_number(obj["number"]) if obj["number"] else ''
+        values = _number_part_values(parse_house_number_full(number_norm_val))
+        distance = house_number_distances(
+            q_number_parsed,
+            {column: np.array([value]) for column, value in zip(NUMBER_PART_COLUMNS, values)}
+        )
+        base_num = values[0]
+        obj["score_decomposition"] = {
+            "street_sim": street_sim,
+            "number_score": float(house_number_scores(distance)[0]),
+            "final_score": obj["score"],
+        }
+        obj["debug"] = {
+            "street_norm": street_norm_val,
+            "number_norm": number_norm_val,
+            "base_num": int(base_num) if base_num != NUMBER_PART_MISSING else None,
+            "distance_on_number_axis": float(distance[0]),
+        }
+
+
 def geocode_improved_fuzzy_only(
     query: str,
     limit: int = 5,
@@ -348,19 +570,33 @@ def geocode_improved_fuzzy_only(
     q_street_norm = norm_street(street_raw)
     q_number_norm = norm_number(number_raw)
     
-    # 3. Парсинг номера дома
-    q_number_parsed = parse_house_number_full(q_number_norm)
+    # 3. Парсинг номера дома (компоненты ограничены так же, как в колонках данных)
+    q_number_parsed = clamp_house_number(parse_house_number_full(q_number_norm))
+    
+    # Ни улицы, ни номера: ранжировать нечего, любые здания города
+    # получили бы одинаковый score
+    if not q_street_norm and q_number_parsed.base is None:
+        result: Dict[str, Any] = {
+            "searched_address": query,
+            "objects": []
+        }
+        if debug:
+            result["parsed_query"] = _parsed_query_debug(query)
+        return result
     
     # 4. Загрузка данных
     df = _get_cached_data()
+    columns = _get_fuzzy_columns(df)
     
-    # 5. Фильтрация по городу
+    # 5. Фильтрация по городу: позиции строк города берём из hash-индекса
+    # базового геокодера вместо сравнения всей колонки. Дальше работаем
+    # с позициями строк и массивами колонок, не копируя DataFrame
     if q_city_norm:
-        df_filtered = df[df["city_norm"] == q_city_norm].copy()
+        rows = np.asarray(_get_norm_index(df, ("city_norm",)).get(q_city_norm, []), dtype=np.intp)
     else:
-        df_filtered = df.copy()
+        rows = np.arange(len(df))
     
-    if df_filtered.empty:
+    if len(rows) == 0:
         return {
             "searched_address": query,
             "objects": []
@@ -368,15 +604,24 @@ def geocode_improved_fuzzy_only(
     
     # 6. Двухшаговый выбор: сначала выбираем лучшую улицу
     # Вариант 1: Выбираем топ-1 или топ-2 улицы с максимальной похожестью
-    unique_streets = df_filtered["street_norm"].unique().tolist()
-    
-    if q_street_norm and unique_streets:
-        # Находим топ-K похожих улиц
+    city_streets = _get_city_streets(df, rows, q_city_norm)
+    
+    if q_street_norm and city_streets.streets:
+        # Находим топ-K похожих улиц. Улицы ниже порога дальше не используются,
+        # поэтому отсекаем их и префильтром, и score_cutoff внутри RapidFuzz.
+        # Запрос и улицы уже прошли norm_street (нижний регистр, без точек
+        # и лишних пробелов), поэтому processor не нужен.
+        # process.cdist здесь не быстрее: запрос один, а после префильтра
+        # остаются сотни улиц, и матрица + отбор топ-K в NumPy обходятся
+        # дороже, чем extract с отсечением по score_cutoff
+        min_street_score = FUZZY_MATCH_MIN_SCORE * 100
         street_matches = process.extract(
             q_street_norm,
-            unique_streets,
+            _street_candidates(q_street_norm, city_streets, min_street_score),
             scorer=fuzz.QRatio,
-            limit=FUZZY_TOP_K
+            processor=None,
+            limit=FUZZY_TOP_K,
+            score_cutoff=min_street_score
         )
         
         # Двухшаговый выбор: берём только топ-1 или топ-2 лучшие улицы
@@ -418,10 +663,25 @@ def geocode_improved_fuzzy_only(
         }
         
         if matching_streets:
-            # Фильтруем по найденным улицам (теперь их максимум 1-2)
-            df_filtered = df_filtered[df_filtered["street_norm"].isin(matching_streets)].copy()
-            # Добавляем score похожести улицы
-            df_filtered["street_sim"] = df_filtered["street_norm"].map(street_scores_dict)
+            # Фильтруем по найденным улицам (теперь их максимум 1-2): позиции
+            # строк улицы берём из hash-индекса (город, улица), не просматривая
+            # все строки города
+            if q_city_norm:
+                street_index = _get_norm_index(df, ("city_norm", "street_norm"))
+                street_rows = [street_index.get((q_city_norm, street), []) for street in matching_streets]
+            else:
+                street_index = _get_norm_index(df, ("street_norm",))
+                street_rows = [street_index.get(street, []) for street in matching_streets]
+            rows = np.concatenate([np.asarray(r, dtype=np.intp) for r in street_rows])
+            # Score похожести улицы
+            street_sim = np.concatenate([
+                np.full(len(r), street_scores_dict[street])
+                for street, r in zip(matching_streets, street_rows)
+            ])
+            # Возвращаем порядок строк df: от него зависит выбор среди равных score
+            order = np.argsort(rows, kind="stable")
+            rows = rows[order]
+            street_sim = street_sim[order]
         else:
             # Если нет похожих улиц, возвращаем пустой результат
             return {
@@ -430,190 +690,102 @@ def geocode_improved_fuzzy_only(
             }
     else:
         # Если улица не указана, считаем score = 0.5
-        df_filtered["street_sim"] = 0.5
+        street_sim = np.full(len(rows), 0.5)
     
-    if df_filtered.empty:
+    if len(rows) == 0:
         return {
             "searched_address": query,
             "objects": []
         }
     
-    # 7. Сравнение номеров домов
-    number_scores: list[float] = []
-    number_distances: list[float] = []
-    
+    # 7. Сравнение номеров домов (по уже разобранным колонкам номера)
     # Проверяем, указан ли номер дома в запросе
     has_number_in_query = q_number_parsed.base is not None
     
-    for _, row in df_filtered.iterrows():
-        c_number_norm = row["number_norm"]
-        c_number_parsed = parse_house_number_full(c_number_norm)
-        
-        # Вычисляем дистанцию
-        dist = house_number_distance(q_number_parsed, c_number_parsed)
-        
-        # Преобразуем в score (экспоненциальное убывание)
-        if dist == 0:
-            num_score = 1.0  # Полное совпадение
-        else:
-            num_score = math.exp(-dist / HOUSE_NUMBER_DISTANCE_BETA)
-        
-        # Если номер дома указан в запросе и есть точное совпадение,
-        # даём бонус к score улицы (для повышения приоритета точных совпадений)
-        if has_number_in_query and dist == 0:
-            # Точное совпадение номера увеличивает вес результата
-            num_score = 1.0
-        
-        number_scores.append(num_score)
-        number_distances.append(dist)
-    
-    df_filtered["number_score"] = number_scores
-    df_filtered["number_distance"] = number_distances
+    number_distances = house_number_distances(
+        q_number_parsed,
+        {column: values[rows] for column, values in columns.number_parts.items()}
+    )
+    number_scores = house_number_scores(number_distances)
     
     # 8. Финальный score
     # Адаптивные веса в зависимости от ситуации
     if has_number_in_query:
-        # Когда номер указан, используем адаптивные веса:
+        # Когда номер указан, используем адаптивные веса для каждой строки:
         # - Если улица очень похожа (>= 0.85), даём ей больше веса
         # - Иначе номер остаётся приоритетным
+        # Ветки считаются сразу для всех строк: np.select берёт первое выполненное
+        # условие, как цепочка if/elif
+        num_score = number_scores
         
-        # Вычисляем среднюю похожесть улиц в результатах
-        avg_street_sim = df_filtered["street_sim"].mean() if len(df_filtered) > 0 else 0.0
+        weight_conditions = [
+            street_sim >= 0.95,  # Почти точное совпадение улицы - улица критически важна
+            street_sim >= 0.9,   # Очень похожая улица - улица важна
+            street_sim >= 0.85,  # Похожая улица - баланс в пользу улицы
+            street_sim >= 0.75,  # Средняя похожесть - стандартные веса
+        ]
+        # Низкая похожесть (default) - номер важнее
+        s_weight = np.select(weight_conditions, [0.6, 0.5, 0.4, 0.3], default=0.2)
+        n_weight = np.select(weight_conditions, [0.4, 0.5, 0.6, 0.7], default=0.8)
         
-        # Если улицы очень похожи, балансируем веса
-        if avg_street_sim >= 0.85:
-            # Высокая похожесть улиц - даём улице больший вес
-            street_weight = 0.4
-            number_weight = 0.6
-        elif avg_street_sim >= 0.7:
-            # Средняя похожесть - баланс
-            street_weight = 0.3
-            number_weight = 0.7
-        else:
-            # Низкая похожесть - номер важнее
-            street_weight = 0.2
-            number_weight = 0.8
+        score = s_weight * street_sim + n_weight * num_score
         
-        # Но для каждой строки индивидуально: если улица очень похожа, увеличиваем её вес
-        # Вычисляем веса для каждой строки отдельно
-        final_scores: list[float] = []
-        for _, row in df_filtered.iterrows():
-            street_sim = row["street_sim"]
-            num_score = row["number_score"]
-            
-            # Индивидуальная корректировка весов на основе похожести улицы
-            if street_sim >= 0.95:
-                # Почти точное совпадение улицы (>= 95%) - улица критически важна
-                # Даже если номер не совпадает, это может быть правильная улица
-                s_weight = 0.6
-                n_weight = 0.4
-            elif street_sim >= 0.9:
-                # Очень похожая улица (>= 90%) - улица важна
-                s_weight = 0.5
-                n_weight = 0.5
-            elif street_sim >= 0.85:
-                # Похожая улица (>= 85%) - баланс в пользу улицы
-                s_weight = 0.4
-                n_weight = 0.6
-            elif street_sim >= 0.75:
-                # Средняя похожесть - стандартные веса
-                s_weight = 0.3
-                n_weight = 0.7
-            else:
-                # Низкая похожесть - номер важнее
-                s_weight = 0.2
-                n_weight = 0.8
-            
-            score = s_weight * street_sim + n_weight * num_score
-            
-            # Дополнительные бонусы
-            c_number_parsed = parse_house_number_full(row["number_norm"])
-            
-            # Бонус 1: Если улица точно совпадает (>= 0.95) и base номера совпадает,
-            # но есть дополнительные компоненты (строение, корпус) - это всё ещё хороший результат
-            if (street_sim >= 0.95 and 
-                q_number_parsed.base is not None and 
-                c_number_parsed.base is not None and
-                q_number_parsed.base == c_number_parsed.base and
-                num_score < 1.0):
-                # Base совпадает, но есть дополнительные компоненты - даём большой бонус
-                # Если улица точно совпадает (1.0), даём минимум 0.95
-                # Это выше, чем другие улицы с точным номером, но не точной улицей
-                if street_sim >= 0.99:
-                    score = max(score, 0.95)  # Почти максимальный score
-                else:
-                    score = max(score, street_sim * 0.9)  # 90% от похожести улицы
-            
-            # Бонус 2: Если улица точно совпадает (>= 0.99), но номер не совпадает вообще
-            elif street_sim >= 0.99 and num_score < 0.1:
-                # Улица точно правильная (>= 99%), но номера нет
-                # Даём очень высокий score - правильная улица важнее неточного номера
-                score = max(score, 0.92)  # Очень высокий score для точной улицы
-            # Бонус 3: Если улица очень похожа (>= 0.95), но номер не совпадает вообще
-            elif street_sim >= 0.95 and num_score < 0.1:
-                # Улица почти точно правильная (>= 95%), но номера нет
-                # Даём высокий минимальный score, чтобы показать правильную улицу
-                score = max(score, street_sim * 0.8)  # Минимум 76% от похожести улицы
-            elif street_sim >= 0.9 and num_score < 0.1:
-                # Улица очень похожа (>= 90%), но номера нет
-                score = max(score, street_sim * 0.7)  # Минимум 63% от похожести улицы
-            
-            final_scores.append(score)
+        # Дополнительные бонусы (номер кандидата уже разобран в колонки при загрузке).
+        # Бонус 1: улица точно совпадает (>= 0.95) и base номера совпадает,
+        # но есть дополнительные компоненты (строение, корпус) - это всё ещё хороший результат
+        same_base = columns.number_parts["number_base"][rows] == q_number_parsed.base
+        base_bonus = (street_sim >= 0.95) & same_base & (num_score < 1.0)
+        # Бонусы 2-3: улица (почти) точно правильная, но номер не совпадает вообще
+        no_number = num_score < 0.1
+        
+        score = np.select(
+            [
+                # Улица точно совпадает (1.0) - минимум 0.95: выше, чем другие улицы
+                # с точным номером, но не точной улицей
+                base_bonus & (street_sim >= 0.99),
+                base_bonus,  # 90% от похожести улицы
+                # Правильная улица важнее неточного номера
+                (street_sim >= 0.99) & no_number,
+                (street_sim >= 0.95) & no_number,  # Минимум 76% от похожести улицы
+                (street_sim >= 0.9) & no_number,   # Минимум 63% от похожести улицы
+            ],
+            [
+                np.maximum(score, 0.95),
+                np.maximum(score, street_sim * 0.9),
+                np.maximum(score, 0.92),
+                np.maximum(score, street_sim * 0.8),
+                np.maximum(score, street_sim * 0.7),
+            ],
+            default=score
+        )
         
-        df_filtered["final_score"] = final_scores
+        final_scores = score
     else:
         # Когда номера нет, больше опираемся на улицу
         street_weight = SCORE_STREET_WEIGHT
         number_weight = SCORE_NUMBER_WEIGHT
         
-        df_filtered["final_score"] = (
-            street_weight * df_filtered["street_sim"]
-            + number_weight * df_filtered["number_score"]
-        )
+        final_scores = street_weight * street_sim + number_weight * number_scores
     
     # Дополнительный бонус за полное совпадение (и улица, и номер)
     if has_number_in_query:
-        exact_match_mask = (
-            (df_filtered["street_sim"] >= 0.95)
-            & (df_filtered["number_score"] == 1.0)
-        )
-        df_filtered.loc[exact_match_mask, "final_score"] = 1.0
+        exact_match_mask = (street_sim >= 0.95) & (number_scores == 1.0)
+        final_scores[exact_match_mask] = 1.0
         
         # Также даём небольшой бонус, если улица очень похожа (>= 0.85), даже если номер не точный
         # Но это уже учитывается в индивидуальных весах выше, поэтому не дублируем
         pass
     
     # 9. Сортировка и выбор топ-N
-    df_sorted = df_filtered.nlargest(limit, "final_score")
+    top = _top_positions(final_scores, limit)
     
-    # 10. Формирование ответа
-    parsed_query_debug: Dict[str, Any] | None = None
-    if debug:
-        street_parts = _decompose_street(q_street_norm)
-        parsed_query_debug = {
-            "raw_city": city_raw,
-            "raw_street": street_raw,
-            "raw_number": number_raw,
-            "city_norm": q_city_norm,
-            "street_norm": street_parts["street_norm"],
-            "street_core": street_parts["street_core"],
-            "street_adj": street_parts["street_adj"],
-            "street_type": street_parts["street_type"],
-            "number_norm": q_number_norm,
-            "number_parsed": {
-                "base": q_number_parsed.base,
-                "corp": q_number_parsed.corpus,
-                "stroenie": q_number_parsed.building,
-                "litera": q_number_parsed.letter,
-            },
-        }
-
+    # 10. Формирование ответа: значения выбранных строк берём из массивов колонок
     objects = []
-    for _, row in df_sorted.iterrows():
+    for position, row in zip(top, rows[top]):
         # Собираем нормализованный адрес в формате организаторов
-        city_val = str(row["city"]) if row.get("city") else ""
-        street_val = str(row["street"]) if row.get("street") else ""
-        number_val = str(row["housenumber"]) if row.get("housenumber") else ""
+        city_val = str(columns.city[row]) if columns.city[row] else ""
+        street_val = str(columns.street[row]) if columns.street[row] else ""
+        number_val = str(columns.housenumber[row]) if columns.housenumber[row] else ""
         
         # Нормализуем для формирования полного адреса
         city_norm_val = norm_city(city_val) if city_val else "москва"
@@ -628,27 +800,29 @@ def geocode_improved_fuzzy_only(
             for_display=True
         ) if street_norm_val else ''
         
+        final_score = final_scores[position]
         obj: Dict[str, Any] = {
             "locality": city_val,
             "street": street_val,
             "number": number_val,
             "normalized_address": normalized_address,  # Нормализованный адрес в формате организаторов
-            "lon": float(row["lon"]),
-            "lat": float(row["lat"]),
-            "score": round(float(row["final_score"]), 4),
+            "lon": round(float(columns.lon[row]), COORD_DECIMALS),
+            "lat": round(float(columns.lat[row]), COORD_DECIMALS),
+            "score": round(float(final_score), 4),
         }
 
         if debug:
+            base_num = columns.number_parts["number_base"][row]
             obj["score_decomposition"] = {
-                "street_sim": float(row["street_sim"]),
-                "number_score": float(row["number_score"]),
-                "final_score": round(float(row["final_score"]), 4),
+                "street_sim": float(street_sim[position]),
+                "number_score": float(number_scores[position]),
+                "final_score": round(float(final_score), 4),
             }
             obj["debug"] = {
-                "street_norm": row["street_norm"],
-                "number_norm": row["number_norm"],
-                "base_num": parse_house_number_full(row["number_norm"]).base,
-                "distance_on_number_axis": float(row["number_distance"]),
+                "street_norm": columns.street_norm_categories[columns.street_norm_codes[row]],
+                "number_norm": columns.number_norm[row],
+                "base_num": int(base_num) if base_num != NUMBER_PART_MISSING else None,
+                "distance_on_number_axis": float(number_distances[position]),
             }
 
         objects.append(obj)
@@ -657,8 +831,8 @@ def geocode_improved_fuzzy_only(
         "searched_address": query,
         "objects": objects,
     }
-    if debug and parsed_query_debug is not None:
-        result["parsed_query"] = parsed_query_debug
+    if debug:
+        result["parsed_query"] = _parsed_query_debug(query)
     return result
 
 
@@ -674,6 +848,11 @@ def geocode_improved(query: str, limit: int = 5, debug: bool = False) -> Dict[st
     Это гарантирует, что там, где baseline уже работает хорошо,
     мы не портим результат фуззи-поиском.
     
+    Результаты кэшируются по (query, limit, debug) - запросы сильно
+    повторяются (автодополнение, повторные нажатия в интерфейсе).
+    Возвращается копия, так что изменять результат можно.
+    Статистика кэша: geocode_improved.cache_info().
+    
     Args:
         query: Строка запроса
         limit: Максимальное количество результатов
@@ -681,10 +860,11 @@ def geocode_improved(query: str, limit: int = 5, debug: bool = False) -> Dict[st
     Returns:
         Словарь с результатами геокодирования
     """
-    # В debug-режиме всегда используем фуззи-алгоритм, чтобы вернуть детальное объяснение.
-    if debug:
-        return geocode_improved_fuzzy_only(query, limit=limit, debug=True)
+    return copy.deepcopy(_geocode_improved_cached(query, limit, debug))
 
+
+@lru_cache(maxsize=GEOCODE_CACHE_SIZE)
+def _geocode_improved_cached(query: str, limit: int, debug: bool) -> Dict[str, Any]:
     # Импортируем здесь, чтобы избежать циклических зависимостей
     from .geocode_basic import geocode_basic
     
@@ -694,10 +874,18 @@ def geocode_improved(query: str, limit: int = 5, debug: bool = False) -> Dict[st
     # 2. Если baseline нашёл результаты, возвращаем их
     # Это сохраняет точность на "чистых" адресах
     if res_basic["objects"]:
-        # Можно немного улучшить score, но координаты и результаты те же
+        # Можно немного улучшить score, но координаты и результаты те же.
+        # В debug-режиме фуззи не перезапускаем: объясняем найденные объекты
+        # и добавляем разбор запроса
+        if debug:
+            _add_basic_objects_debug(res_basic["objects"], query)
+            res_basic["parsed_query"] = _parsed_query_debug(query)
         return res_basic
     
     # 3. Если baseline ничего не нашёл - включаем фуззи-алгоритм
     # Это помогает с опечатками, неточными запросами и т.п.
-    return geocode_improved_fuzzy_only(query, limit=limit, debug=False)
+    return geocode_improved_fuzzy_only(query, limit=limit, debug=debug)
+
 
+geocode_improved.cache_info = _geocode_improved_cached.cache_info
+geocode_improved.cache_clear = _geocode_improved_cached.cache_clear
@@ -4,10 +4,46 @@
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+# Размер LRU-кэша функций нормализации: адреса сильно повторяются
+# (одна улица - тысячи домов, популярные запросы к API), так что повторные
+# значения не проходят через регулярные выражения заново
+NORM_CACHE_SIZE = 100_000
+
+# Удаление знаков препинания: str.translate — один проход на C без regex
+_PUNCT_DELETE = str.maketrans('', '', '.,;')
+
+# Для номера дома: убрать точки и перевести в нижний регистр только кириллические
+# заглавные (литеры); латиница остаётся как есть
+_NUMBER_TRANSLATE = str.maketrans(
+    {'.': None, 'Ё': 'ё', **{chr(c): chr(c).lower() for c in range(ord('А'), ord('Я') + 1)}}
+)
+
+# Регулярные выражения компилируются один раз при импорте модуля
+# Корпус/строение в любой форме (к/корп./корпус, с/стр./строение) - одним проходом.
+# Число после сокращения только проверяется (не поглощается), поэтому цепочки
+# вида "1к2корпус3" тоже разбираются за один проход. Применяются после
+# _NUMBER_TRANSLATE (кириллица уже в нижнем регистре), поэтому без IGNORECASE
+_RE_CORPUS = re.compile(r'(\d+)\s*(?:к|корп\.?|корпус)\s*(?=\d)')
+_RE_BUILDING = re.compile(r'(\d+)\s*(?:с|стр\.?|строение)\s*(?=\d)')
+# Сокращения к/с в нормализованном номере для вывода (так же: "12 к1 с2")
+_RE_NUMBER_ABBR = re.compile(r'(\d+)\s*([кс])\s*(?=\d)', re.IGNORECASE)
+_NUMBER_ABBR_WORDS = {'к': 'корпус', 'с': 'строение'}
+_RE_FRACTION = re.compile(r'(\d+)\s*/\s*(\d+)')
+# Номер в каноническом виде norm_number: "12", "12а", "12 к1", "12 с2", "12 к1 с2"
+_RE_NUMBER_CANONICAL = re.compile(r'(\d+)(?:([а-яёa-z])|(?: к(\d+))?(?: с(\d+))?)')
+_RE_BASE = re.compile(r'^(\d+)')
+_RE_CORPUS_PART = re.compile(r'к\s*(\d+)', re.IGNORECASE)
+_RE_CORPUS_WORD = re.compile(r'корпус\s+(\d+)')
+_RE_BUILDING_PART = re.compile(r'с\s*(\d+)', re.IGNORECASE)
+_RE_BUILDING_WORD = re.compile(r'строение\s+(\d+)')
+_RE_LETTER = re.compile(r'(\d+)\s*([а-яёa-z]+)')
+
 # Словарь нормализации типов улиц (ФИАС-подобный)
 STREET_TYPE_MAP = {
     # улица
@@ -55,6 +91,9 @@ STREET_TYPE_MAP = {
     'тупик': 'тупик',
 }
 
+# Полные названия типов улиц (в build_full_norm пишутся с маленькой буквы)
+STREET_TYPES = frozenset(STREET_TYPE_MAP.values())
+
 # Словарь нормализации прилагательных
 ADJECTIVE_MAP = {
     'б': 'большая',
@@ -82,7 +121,15 @@ ADJECTIVE_MAP = {
     'старое': 'старая',
 }
 
+# Классы токенов улицы для norm_street: токен -> ('type' | 'adj', полная форма).
+# Точки из токенов удаляются заранее, поэтому ключи с точкой не срабатывают
+_STREET_TOKEN_CLASSES = {
+    **{key: ('adj', value) for key, value in ADJECTIVE_MAP.items()},
+    **{key: ('type', value) for key, value in STREET_TYPE_MAP.items()},
+}
+
 
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def norm_city(s: str) -> str:
     """
     Нормализует название города.
@@ -104,14 +151,18 @@ def norm_city(s: str) -> str:
     s = s.strip().lower()
     
     # Убираем точки, запятые
-    s = re.sub(r'[.,;]', '', s)
+    s = s.translate(_PUNCT_DELETE)
     
-    # Убираем префиксы
-    s = re.sub(r'^г\.?\s*', '', s)
-    s = re.sub(r'^город\s+', '', s)
+    # Убираем префиксы (точки уже удалены): "г" с пробелами после него,
+    # затем "город" + пробелы. lstrip() убирает те же пробельные символы, что \s
+    if s.startswith('г'):
+        s = s[1:].lstrip()
+    if s.startswith('город') and s[5:6].isspace():
+        s = s[5:].lstrip()
     
-    # Убираем лишние пробелы
-    s = re.sub(r'\s+', ' ', s).strip()
+    # Убираем лишние пробелы: split() без аргументов режет по любым пробельным
+    # символам (как \s+) и отбрасывает пустые части, так что strip() не нужен
+    s = ' '.join(s.split())
     
     # Английское название
     if 'moscow' in s:
@@ -124,6 +175,7 @@ def norm_city(s: str) -> str:
     return s
 
 
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def norm_street(s: str) -> str:
     """
     Нормализует название улицы.
@@ -143,16 +195,9 @@ def norm_street(s: str) -> str:
     if not s:
         return ''
     
-    s = s.strip().lower()
-    
-    # Убираем точки, запятые
-    s = re.sub(r'[.,;]', '', s)
-    
-    # Убираем лишние пробелы
-    s = re.sub(r'\s+', ' ', s).strip()
-    
-    # Разбиваем на токены
-    tokens = s.split()
+    # Убираем точки, запятые и разбиваем на токены: split() заодно
+    # убирает лишние пробелы по краям и между словами
+    tokens = s.lower().translate(_PUNCT_DELETE).split()
     
     if not tokens:
         return ''
@@ -161,21 +206,16 @@ def norm_street(s: str) -> str:
     street_type_found = None
     adjective_found = None
     
-    # Ищем тип улицы и прилагательное
+    # Ищем тип улицы и прилагательное: один поиск в словаре на токен
     for token in tokens:
-        # Проверяем тип улицы
-        token_clean = token.rstrip('.')
-        if token_clean in STREET_TYPE_MAP:
-            street_type_found = STREET_TYPE_MAP[token_clean]
-            continue
-        
-        # Проверяем прилагательное
-        if token in ADJECTIVE_MAP:
-            adjective_found = ADJECTIVE_MAP[token]
-            continue
-        
-        # Обычное слово
-        normalized_tokens.append(token)
+        token_class = _STREET_TOKEN_CLASSES.get(token)
+        if token_class is None:
+            # Обычное слово
+            normalized_tokens.append(token)
+        elif token_class[0] == 'type':
+            street_type_found = token_class[1]
+        else:
+            adjective_found = token_class[1]
     
     # Собираем результат: прилагательное + название + тип
     # ВАЖНО: согласно требованиям организаторов, названия должны быть БЕЗ сокращений
@@ -195,9 +235,10 @@ def norm_street(s: str) -> str:
         # добавляем "улица" по умолчанию (самый частый тип)
         result_parts.append('улица')
     
-    return ' '.join(result_parts) if result_parts else s
+    return ' '.join(result_parts)
 
 
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def norm_number(s: str) -> str:
     """
     Нормализует номер дома.
@@ -222,34 +263,30 @@ def norm_number(s: str) -> str:
     if not s:
         return ''
     
-    s = s.strip()
-    
-    # Убираем точки
-    s = re.sub(r'\.', '', s)
+    # Убираем точки и приводим кириллицу к нижнему регистру (литеры и
+    # сокращения к/с). Латиница остаётся как есть, поэтому не s.lower()
+    s = s.translate(_NUMBER_TRANSLATE)
     
     # Нормализуем корпус: используем сокращение "к" для компактности
-    s = re.sub(r'(\d+)\s*к\s*(\d+)', r'\1 к\2', s, flags=re.IGNORECASE)
-    s = re.sub(r'(\d+)\s*корп\.?\s*(\d+)', r'\1 к\2', s, flags=re.IGNORECASE)
-    s = re.sub(r'(\d+)\s*корпус\s*(\d+)', r'\1 к\2', s, flags=re.IGNORECASE)
+    s = _RE_CORPUS.sub(r'\1 к', s)
     
     # Нормализуем строение: используем сокращение "с"
-    s = re.sub(r'(\d+)\s*с\s*(\d+)', r'\1 с\2', s, flags=re.IGNORECASE)
-    s = re.sub(r'(\d+)\s*стр\.?\s*(\d+)', r'\1 с\2', s, flags=re.IGNORECASE)
-    s = re.sub(r'(\d+)\s*строение\s*(\d+)', r'\1 с\2', s, flags=re.IGNORECASE)
+    s = _RE_BUILDING.sub(r'\1 с', s)
     
     # Дробь как корпус
-    s = re.sub(r'(\d+)\s*/\s*(\d+)', r'\1 к\2', s)
-    
-    # Приводим литеры к нижнему регистру
-    s = re.sub(r'([А-ЯЁ])', lambda m: m.group(1).lower(), s)
+    s = _RE_FRACTION.sub(r'\1 к\2', s)
     
     # Убираем лишние пробелы
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = ' '.join(s.split())
     
     return s
 
 
-@dataclass
+# Слова после номера, которые не являются литерой
+_NOT_LETTERS = frozenset(('корпус', 'строение', 'к', 'с'))
+
+
+@dataclass(slots=True)
 class HouseNumberParsed:
     """Разобранный номер дома."""
     base: Optional[int] = None       # основной номер, например 12
@@ -258,10 +295,14 @@ class HouseNumberParsed:
     letter: Optional[str] = None     # литера, если есть
 
 
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def parse_house_number_full(norm_number: str) -> HouseNumberParsed:
     """
     Разбирает нормализованный номер дома на компоненты.
     
+    Результат кэшируется, поэтому один и тот же объект возвращается
+    для одинаковых номеров - не изменяйте его.
+    
     Поддерживает форматы: "12 к1", "12 с2", "12 к1 с2"
     
     Args:
@@ -273,44 +314,125 @@ def parse_house_number_full(norm_number: str) -> HouseNumberParsed:
     if not norm_number:
         return HouseNumberParsed()
     
+    # Быстрый путь: номер в каноническом виде разбирается одним регулярным
+    # выражением. Результат тот же, что у общего разбора ниже
+    canonical = _RE_NUMBER_CANONICAL.fullmatch(norm_number)
+    if canonical:
+        base, letter, corpus, building = canonical.groups()
+        return HouseNumberParsed(
+            base=int(base),
+            corpus=int(corpus) if corpus is not None else None,
+            building=int(building) if building is not None else None,
+            letter=letter if letter not in _NOT_LETTERS else None,
+        )
+    
     result = HouseNumberParsed()
     
     # Извлекаем основной номер (первое число)
-    base_match = re.search(r'^(\d+)', norm_number)
+    base_match = _RE_BASE.search(norm_number)
     if base_match:
         result.base = int(base_match.group(1))
     
     # Извлекаем корпус (формат: "к1", "к 1", "корпус 1")
-    corpus_match = re.search(r'к\s*(\d+)', norm_number, flags=re.IGNORECASE)
+    corpus_match = _RE_CORPUS_PART.search(norm_number)
     if corpus_match:
         result.corpus = int(corpus_match.group(1))
     else:
         # Пробуем полную форму
-        corpus_match = re.search(r'корпус\s+(\d+)', norm_number)
+        corpus_match = _RE_CORPUS_WORD.search(norm_number)
         if corpus_match:
             result.corpus = int(corpus_match.group(1))
     
     # Извлекаем строение (формат: "с1", "с 1", "строение 1")
-    building_match = re.search(r'с\s*(\d+)', norm_number, flags=re.IGNORECASE)
+    building_match = _RE_BUILDING_PART.search(norm_number)
     if building_match:
         result.building = int(building_match.group(1))
     else:
         # Пробуем полную форму
-        building_match = re.search(r'строение\s+(\d+)', norm_number)
+        building_match = _RE_BUILDING_WORD.search(norm_number)
         if building_match:
             result.building = int(building_match.group(1))
     
     # Извлекаем литеру (кириллица или латиница после номера)
-    letter_match = re.search(r'(\d+)\s*([а-яёa-z]+)', norm_number)
+    letter_match = _RE_LETTER.search(norm_number)
     if letter_match:
         letter = letter_match.group(2)
         # Проверяем, что это не слово "корпус", "строение", "к", "с"
-        if letter not in ['корпус', 'строение', 'к', 'с'] and len(letter) == 1:
+        if letter not in _NOT_LETTERS and len(letter) == 1:
             result.letter = letter
     
     return result
 
 
+# Строковые колонки храним в Arrow (непрерывные UTF-8 буферы вместо отдельных
+# Python-объектов). В pandas >= 3 это тип "str" по умолчанию; na_value=NaN
+# сохраняет привычную семантику пропусков, в старых pandas её нет
+try:
+    TEXT_DTYPE = pd.StringDtype('pyarrow', na_value=np.nan)
+except TypeError:
+    TEXT_DTYPE = pd.StringDtype('pyarrow')
+
+# Разобранный номер дома в виде целочисленных колонок DataFrame
+# (base, corpus, building и код символа литеры); -1 - компонента нет
+NUMBER_PART_COLUMNS = ('number_base', 'number_corpus', 'number_building', 'number_letter')
+NUMBER_PART_MISSING = -1
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def clamp_house_number(parsed: HouseNumberParsed) -> HouseNumberParsed:
+    """
+    Ограничивает числовые компоненты номера дома максимумом int64.
+    
+    Мусорные "номера" из десятков цифр не должны ломать колонки
+    NUMBER_PART_COLUMNS; номер запроса ограничивается так же, чтобы
+    сравнение с ними оставалось симметричным.
+    """
+    parts = (parsed.base, parsed.corpus, parsed.building)
+    if all(value is None or value <= _INT64_MAX for value in parts):
+        return parsed
+    base, corpus, building = (
+        None if value is None else min(value, _INT64_MAX) for value in parts
+    )
+    return HouseNumberParsed(base, corpus, building, parsed.letter)
+
+
+def _number_part_values(parsed: HouseNumberParsed) -> tuple:
+    parsed = clamp_house_number(parsed)
+    
+    def part(value: Optional[int]) -> int:
+        return NUMBER_PART_MISSING if value is None else value
+    
+    letter = NUMBER_PART_MISSING if parsed.letter is None else ord(parsed.letter)
+    return part(parsed.base), part(parsed.corpus), part(parsed.building), letter
+
+
+def add_number_part_columns(df) -> pd.DataFrame:
+    """
+    Добавляет к DataFrame колонки NUMBER_PART_COLUMNS с разобранным number_norm.
+    
+    parse_house_number_full вызывается один раз на каждое уникальное значение,
+    после чего скоринг номеров работает по массивам NumPy без разбора строк.
+    
+    Args:
+        df: DataFrame с колонкой number_norm
+        
+    Returns:
+        Тот же DataFrame с добавленными колонками
+    """
+    codes, uniques = pd.factorize(df['number_norm'])
+    table = np.array(
+        [_number_part_values(parse_house_number_full(str(value))) for value in uniques]
+        # Последняя строка - для пропусков (код -1 у factorize)
+        + [(NUMBER_PART_MISSING,) * len(NUMBER_PART_COLUMNS)],
+        dtype=np.int64
+    )
+    values = table[codes]
+    for i, column in enumerate(NUMBER_PART_COLUMNS):
+        df[column] = values[:, i]
+    return df
+
+
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def format_number_for_display(norm_number: str) -> str:
     """
     Форматирует нормализованный номер дома для вывода.
@@ -333,18 +455,18 @@ def format_number_for_display(norm_number: str) -> str:
     # Заменяем сокращения на полные слова
     result = norm_number
     
-    # Заменяем "к" на "корпус" (только если это не часть другого слова)
-    result = re.sub(r'(\d+)\s*к\s*(\d+)', r'\1 корпус \2', result, flags=re.IGNORECASE)
-    
-    # Заменяем "с" на "строение" (только если это не часть другого слова)
-    result = re.sub(r'(\d+)\s*с\s*(\d+)', r'\1 строение \2', result, flags=re.IGNORECASE)
+    # Заменяем "к" на "корпус" и "с" на "строение" (только между числами)
+    result = _RE_NUMBER_ABBR.sub(
+        lambda m: f"{m.group(1)} {_NUMBER_ABBR_WORDS[m.group(2).lower()]} ", result
+    )
     
     # Убираем лишние пробелы
-    result = re.sub(r'\s+', ' ', result).strip()
+    result = ' '.join(result.split())
     
     return result
 
 
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def build_full_norm(city: str, street: str, number: str, for_display: bool = False) -> str:
     """
     Строит полный нормализованный адрес.
@@ -382,13 +504,10 @@ def build_full_norm(city: str, street: str, number: str, for_display: bool = Fal
     if street:
         if for_display:
             street_words = street.split()
-            # Список типов улиц, которые должны быть с маленькой буквы
-            street_types_lower = {'улица', 'проспект', 'проезд', 'переулок', 'бульвар', 
-                                  'шоссе', 'набережная', 'площадь', 'аллея', 'тупик'}
             # Форматируем: типы улиц - с маленькой буквы, остальные слова - с заглавной
             formatted_words = []
             for word in street_words:
-                if word.lower() in street_types_lower:
+                if word.lower() in STREET_TYPES:
                     formatted_words.append(word.lower())
                 else:
                     formatted_words.append(word.capitalize())
@@ -421,6 +540,42 @@ def build_full_norm(city: str, street: str, number: str, for_display: bool = Fal
         return ' '.join(parts) if parts else ""
 
 
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    """
+    Применяет функцию нормализации к колонке, вызывая её один раз на каждое
+    уникальное значение (адреса сильно повторяются).
+    
+    Args:
+        values: Исходная колонка
+        func: Функция нормализации строки (norm_city, norm_street, norm_number)
+        
+    Returns:
+        Колонка нормализованных значений с тем же индексом
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    table = np.array([func(value) for value in uniques], dtype=object)
+    return pd.Series(table[codes], index=values.index, dtype=TEXT_DTYPE)
+
+
+# Нормализованные колонки, которые храним как Categorical
+CATEGORICAL_COLUMNS = ('city_norm', 'street_norm')
+
+
+def to_categorical_columns(df) -> pd.DataFrame:
+    """
+    Переводит CATEGORICAL_COLUMNS в pandas Categorical (уже категориальные
+    колонки и отсутствующие колонки пропускаются).
+    
+    Город почти всегда один ('москва'), улиц на порядки меньше, чем строк:
+    в Categorical строки хранятся один раз, а в колонке остаются целые коды.
+    number_norm остаётся строкой - там почти все значения разные.
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
 def add_normalized_columns(df) -> pd.DataFrame:
     """
     Добавляет нормализованные колонки к DataFrame.
@@ -431,31 +586,44 @@ def add_normalized_columns(df) -> pd.DataFrame:
     Returns:
         DataFrame с добавленными колонками:
         - city_norm, street_norm, number_norm, full_norm
+        - NUMBER_PART_COLUMNS (см. add_number_part_columns)
+        Колонки lon/lat приводятся к float32, строковые - к TEXT_DTYPE (Arrow),
+        CATEGORICAL_COLUMNS - к Categorical (см. to_categorical_columns).
     """
-    df = df.copy()
-    
-    df['city_norm'] = df['city'].apply(norm_city)
-    df['street_norm'] = df['street'].apply(norm_street)
-    df['number_norm'] = df['housenumber'].apply(norm_number)
+    # astype возвращает новый DataFrame (без копирования данных при Copy-on-Write),
+    # поэтому колонки ниже добавляются не в DataFrame вызывающего кода
+    df = df.astype({'city': TEXT_DTYPE, 'street': TEXT_DTYPE, 'housenumber': TEXT_DTYPE})
+    df['city_norm'] = _map_unique(df['city'], norm_city)
+    df['street_norm'] = _map_unique(df['street'], norm_street)
+    df['number_norm'] = _map_unique(df['housenumber'], norm_number)
     
     # Если city_norm пустой, но данные из Москвы (координаты в пределах Москвы),
     # устанавливаем "москва" по умолчанию
     # Москва примерно: lat 55.5-55.9, lon 37.3-37.9
+    # Маска считается по массивам NumPy, без промежуточных Series
+    lat = df['lat'].to_numpy()
+    lon = df['lon'].to_numpy()
     moscow_mask = (
-        (df['city_norm'] == '') & 
-        (df['lat'] >= 55.5) & (df['lat'] <= 55.9) &
-        (df['lon'] >= 37.3) & (df['lon'] <= 37.9)
+        (df['city_norm'] == '').to_numpy(dtype=bool) &
+        (lat >= 55.5) & (lat <= 55.9) &
+        (lon >= 37.3) & (lon <= 37.9)
     )
     df.loc[moscow_mask, 'city_norm'] = 'москва'
     
-    df['full_norm'] = df.apply(
-        lambda row: build_full_norm(
-            row['city_norm'],
-            row['street_norm'],
-            row['number_norm']
-        ),
-        axis=1
+    # Координаты зданий храним в float32: точности (~0.3 м для Москвы) хватает,
+    # а колонки занимают вдвое меньше памяти
+    df[['lon', 'lat']] = df[['lon', 'lat']].astype(np.float32)
+    
+    # То же, что build_full_norm(city, street, number), но сразу для всей колонки:
+    # непустые части через пробел. Сами части не содержат лишних пробелов,
+    # поэтому пустые части дают только лишние пробелы, которые и убираем
+    df['full_norm'] = (
+        df['city_norm'].str.cat([df['street_norm'], df['number_norm']], sep=' ')
+        .str.replace(r' {2,}', ' ', regex=True)
+        .str.strip(' ')
     )
     
-    return df
+    df = to_categorical_columns(df)
+    
+    return add_number_part_columns(df)
 
@@ -203,6 +203,33 @@ def test_5_geocoder_integration():
     return all_passed
 
 
+def test_6_empty_query():
+    """Тест 6: Пустой запрос"""
+    print("\n" + "="*70)
+    print("ТЕСТ 6: Пустой запрос не возвращает произвольные здания")
+    print("="*70)
+    
+    test_queries = ["", ",,,", "  ,  , "]
+    
+    all_passed = True
+    for i, query in enumerate(test_queries, 1):
+        result_basic = geocode_basic(query, limit=3)
+        result_improved = geocode_improved(query, limit=3)
+        passed = result_basic["objects"] == [] and result_improved["objects"] == []
+        status = "✓" if passed else "✗"
+        
+        print(f"\nТест 6.{i}: Запрос '{query}'")
+        print(f"  Базовый геокодер: найдено {len(result_basic['objects'])} результатов")
+        print(f"  Улучшенный геокодер: найдено {len(result_improved['objects'])} результатов")
+        print(f"  Ожидалось: 0")
+        print(f"  {status} {'ПРОШЕЛ' if passed else 'НЕ ПРОШЕЛ'}")
+        
+        if not passed:
+            all_passed = False
+    
+    return all_passed
+
+
 def main():
     """Запуск всех тестов"""
     print("\n" + "="*70)
@@ -214,6 +241,7 @@ def main():
     print("3. Формат номера дома: {{номер}} {{корпус}} {{строение}} (например, 50 к1 с15)")
     print("4. Порядок слов в улице: прилагательное + название + тип")
     print("5. Интеграция с геокодерами")
+    print("6. Пустой запрос возвращает пустой список objects")
     print()
     
     results = []
@@ -233,6 +261,9 @@ def main():
     # Тест 5
     results.append(("Интеграция с геокодерами", test_5_geocoder_integration()))
     
+    # Тест 6
+    results.append(("Пустой запрос", test_6_empty_query()))
+    
     # Итоги
     print("\n" + "="*70)
     print("ИТОГИ ТЕСТИРОВАНИЯ")